@@ -1,4 +1,3 @@
-
 import time
 import logging
 from typing import TYPE_CHECKING, Set, Dict, Any
@@ -8,7 +7,20 @@ import worlds._bizhawk as bizhawk
 from worlds._bizhawk.client import BizHawkClient
 from ..data.Constants import *
 from ..data.DynamicEntrances import DYNAMIC_ENTRANCES_BY_SCENE
-from ..Util import *
+from .tables import LazyTable, startup_report, startup_timer
+with startup_timer("import Util"):
+    from ..Util import *
+from .memory import MemoryTransaction, CompiledReadList, ReadListCache, compile_read_list, READ_SPAN_GAP
+from .received_items import received_item_index
+from .heap import heap_resolver
+from .outbox import outbox, queue_msgs
+from .requirements import DynamicRequirements, compile_requirements
+from .detection import EntranceIndex, LocationGrid, WatchTable
+from .scheduler import PollScheduler, Debouncer
+from .profiling import PhaseTimer
+from .accounting import RoundTripAccounting
+from .tracing import (trace_logger, er_logger, item_logger, location_logger, flag_logger, memory_logger,
+                      is_tracing, start_trace_logging)
 
 if TYPE_CHECKING:
     from worlds._bizhawk.context import BizHawkClientContext
@@ -28,91 +40,84 @@ def split_bits(value, size):
 
 
 def item_count(ctx, item_name) -> int:
-    return sum([1 for i in ctx.items_received if i.item == ITEMS_DATA[item_name]["id"]])
+    return received_item_index(ctx).count(ITEMS_DATA[item_name]["id"])
 
 
-# Read list of address data
-async def read_memory_values(ctx, read_list: dict[str, tuple[int, int, str]], signed=False) -> dict[str, int]:
-    keys = read_list.keys()
-    read_data = [(a, s, d) for a, s, d in read_list.values()]
-    read_result = await bizhawk.read(ctx.bizhawk_ctx, read_data)
-    values = [int.from_bytes(i, "little", signed=signed) for i in read_result]
-    return {key: value for key, value in zip(keys, values)}
+# Read list of address data, merged into contiguous spans
+async def read_memory_values(ctx, read_list: dict[str, tuple[int, int, str]] | CompiledReadList,
+                             signed=False) -> dict[str, int]:
+    if not isinstance(read_list, CompiledReadList):
+        read_list = compile_read_list(read_list)
+    read_result = await bizhawk.read(ctx.bizhawk_ctx, read_list.spans)
+    return read_list.decode(read_result, signed)
 
 
 # Read single address
 async def read_memory_value(ctx, address: int, size=1, domain="Main RAM", signed=False, silent=False) -> int:
     read_result = await bizhawk.read(ctx.bizhawk_ctx, [(address, size, domain)])
+    value = int.from_bytes(read_result[0], "little", signed=signed)
     if not silent:
-        print("Reading memory value", hex(address), size, domain, ", got value",
-              hex(int.from_bytes(read_result[0], "little")))
-    return int.from_bytes(read_result[0], "little", signed=signed)
+        memory_logger.debug("Reading memory value %#x %s %s, got value %#x", address, size, domain, value)
+    return value
 
 
 # Write single address
 async def write_memory_value(ctx, address: int, value: int, domain="Main RAM", incr=None, size=1, unset=False,
                              overwrite=False):
-    prev = await read_memory_value(ctx, address, size, domain)
+    transaction = MemoryTransaction()
     if incr is not None:
         value = -value if unset else value
-        if incr:
-            write_value = prev + value
-        else:
-            write_value = prev - value
-        write_value = 0 if write_value <= 0 else write_value
+        transaction.increment(address, value if incr else -value, size, domain)
+    elif unset:
+        memory_logger.debug("Unseting bit %#x %#x with filter %#x", address, value, ~value)
+        transaction.unset_bits(address, value, size, domain)
+    elif not overwrite:
+        transaction.set_bits(address, value, size, domain)
     else:
-        if unset:
-            print(f"Unseting bit {hex(address)} {hex(value)} with filter {hex(~value)} from prev {hex(prev)} "
-                  f"for result {hex(prev & (~value))}")
-            write_value = prev & (~value)
-        elif not overwrite:
-            write_value = prev | value
-        else:
-            write_value = value
-    write_value = split_bits(write_value, size)
-    print(f"Writing Memory: {hex(address)}, {write_value}, {size}, {domain}, {incr}, {unset}")
-    await bizhawk.write(ctx.bizhawk_ctx, [(address, write_value, domain)])
+        transaction.overwrite(address, value, size, domain)
+    await transaction.commit(ctx)
+    write_value = split_bits(transaction.result(address, size, domain), size)
+    memory_logger.debug("Writing Memory: %#x, %s, %s, %s, %s, %s", address, write_value, size, domain, incr, unset)
     return write_value
 
 
 # Write list of values starting from address
 async def write_memory_values(ctx, address: int, values: list, domain="Main RAM", overwrite=False, size=4):
+    transaction = MemoryTransaction()
     if not overwrite:
-        prev = await read_memory_value(ctx, address, len(values), domain)
-        new_values = [old | new for old, new in zip(split_bits(prev, size), values)]
-        print(f"\tvalues: {new_values}, old: {split_bits(prev, size)}")
+        for i, value in enumerate(values[:size]):
+            transaction.set_bits(address + i, value, domain=domain)
     else:
-        new_values = values
-    await bizhawk.write(ctx.bizhawk_ctx, [(address, new_values, domain)])
+        transaction.overwrite(address, values, domain=domain)
+    await transaction.commit(ctx)
 
 
 # Get address from pointer
 async def get_address_from_heap(ctx, pointer, offset=0) -> int:
-    m_course = 0
-    while m_course == 0:
-        m_course = await read_memory_value(ctx, pointer, 4, domain="Data TCM")
-    read = await read_memory_value(ctx, m_course - 0x02000000, 4)
-    print(f"Got map address @ {hex(read + offset - 0x02000000)}")
-    return read + offset - 0x02000000
+    # Cached until the next load or stage change, see heap.HeapPointerResolver
+    return await heap_resolver(ctx).resolve(ctx, pointer, offset)
 
 
 class DSZeldaClient(BizHawkClient):
     local_checked_locations: Set[int]
     local_scouted_locations: Set[int]
     local_tracker: Dict[str, Any]
-    item_id_to_name: Dict[int, str]
-    location_name_to_id: Dict[str, int]
-    location_area_to_watches: Dict[int, dict[str, dict]]
     watches: Dict[str, tuple[int, int, str]]
 
+    # Lookup tables, built from the game's Util on first use. None of these cost more to build than hashing the data
+    # package for the disk cache does, so none are cached. Mark expensive game tables with cache=True
+    table_cache = True
+    item_id_to_name: Dict[int, str] = LazyTable("build_item_id_to_name_dict")
+    location_name_to_id: Dict[str, int] = LazyTable("build_location_name_to_id_dict")
+    location_area_to_watches: Dict[int, dict[str, dict]] = LazyTable("build_location_room_to_watches")
+    scene_to_dynamic_flag = LazyTable("build_scene_to_dynamic_flag")
+    hint_scene_to_watches = LazyTable("build_hint_scene_to_watches")
+    entrance_id_to_entrance = LazyTable("build_entrance_id_to_data")
+    dynamic_requirements: dict[int, DynamicRequirements] = LazyTable(lambda self: self._compile_dynamic_requirements())
+
     def __init__(self) -> None:
         super().__init__()
-        self.item_id_to_name = build_item_id_to_name_dict()
-        self.location_name_to_id = build_location_name_to_id_dict()
-        self.location_area_to_watches = build_location_room_to_watches()
-        self.scene_to_dynamic_flag = build_scene_to_dynamic_flag()
-        self.hint_scene_to_watches = build_hint_scene_to_watches()
-        self.entrance_id_to_entrance = build_entrance_id_to_data()
+        start_trace_logging()
 
         self.starting_flags = None
         self.dungeon_key_data = None
@@ -127,6 +132,8 @@ class DSZeldaClient(BizHawkClient):
         self.stage_flag_offset = 0x268
         self.entrances = {}
         self.hint_data = {}
+        self._hint_candidates = {}
+        self._hint_candidates_source = None
 
         self.local_checked_locations = set()
         self.local_scouted_locations = set()
@@ -143,6 +150,7 @@ class DSZeldaClient(BizHawkClient):
 
         self.last_scene = None
         self.locations_in_scene = {}
+        self.location_grid: LocationGrid | None = None  # Built from locations_in_scene on the first pickup
         self.watches = {}
         self.receiving_location = False
         self.last_vanilla_item: list[str | list[tuple[str, int]]] = []
@@ -156,6 +164,10 @@ class DSZeldaClient(BizHawkClient):
         self._dynamic_flags_to_reset = []
 
         self.main_read_list = {}
+        self.read_span_gap = READ_SPAN_GAP  # Bytes of gap allowed when merging reads into one span
+        self._main_read_cache = ReadListCache()
+        self._watch_table = None  # self.watches compiled by address, recompiled when watches change
+        self._watches_version = 0  # Bumped by watches_changed
         self.read_result = {}
         self.current_stage = 0xB
         self.current_scene = None
@@ -171,13 +183,17 @@ class DSZeldaClient(BizHawkClient):
 
         self._entered_entrance = False
         self._loading_scene = False
+        self._was_loading = False  # Loading variable on the last cycle, to catch every load starting
         self._backup_coord_read = None
         self.prev_rupee_count = 0
         self._log_received_items = False
+        self.bulk_item_sync = True  # Give backlogged items all at once
+        self.bulk_item_sync_threshold = 2  # Backlog size to start bulk receiving at
 
         self.warp_to_start_flag = False
         self.er_map: dict[int, dict["PHTransition", "PHTransition"]] = {}
         self.er_in_scene: dict["PHTransition", "PHTransition"] | None = None
+        self.er_index: EntranceIndex | None = None  # Built from er_in_scene when a room finishes loading
         self.er_exit_coord_writes: list | None = None
 
         self.delay_pickup = None
@@ -192,6 +208,14 @@ class DSZeldaClient(BizHawkClient):
 
         self.precision_mode = False
 
+        self.poll_scheduler = PollScheduler()  # Picks ctx.watcher_timeout, configure rates on it
+        self.phase_timer = PhaseTimer()  # Set phase_timer.enabled to time each phase of game_watcher
+        self.round_trips = RoundTripAccounting()  # Set round_trips.enabled to count connector round trips per cycle
+        self.clock = time.time  # Replaced by trace replays
+        # Tracker scene goes out once stable for this many seconds, or when the room finishes loading
+        self.ut_scene_debouncer = Debouncer(1.0, clock=lambda: self.clock())
+        self.trace_recorder = None
+
     async def validate_rom(self, ctx: "BizHawkClientContext") -> bool:
         try:
             if not await self.check_game_version(ctx):
@@ -207,8 +231,8 @@ class DSZeldaClient(BizHawkClient):
         ctx.game = self.game
         ctx.items_handling = 0b111
         ctx.want_slot_data = True
-        ctx.watcher_timeout = 0.5
-        print(f"validation: {ctx.game}, {ctx.items_handling}")
+        ctx.watcher_timeout = self.poll_scheduler.next_interval("menu")
+        trace_logger.debug("validation: %s, %s", ctx.game, ctx.items_handling)
         return True
 
     async def check_game_version(self, ctx: "BizHawkClientContext") -> bool:
@@ -278,15 +302,19 @@ class DSZeldaClient(BizHawkClient):
         :param locations:
         :return:
         """
-        local_scouted_locations = set(ctx.locations_scouted)
-        for loc in locations:
-            local_scouted_locations.add(LOCATIONS_DATA[loc]["id"])
+        await self._request_scouts(ctx, [LOCATIONS_DATA[loc]["id"] for loc in locations])
 
-        if self.local_scouted_locations != local_scouted_locations:
-            self.local_scouted_locations = local_scouted_locations
-            await ctx.send_msgs([{
+    async def _request_scouts(self, ctx, location_ids):
+        """
+        hint the location ids that haven't been requested this connection or acknowledged by the server yet
+        """
+        new_ids = [i for i in dict.fromkeys(location_ids)
+                   if i not in self.local_scouted_locations and i not in ctx.locations_scouted]
+        if new_ids:
+            self.local_scouted_locations.update(new_ids)
+            await queue_msgs(ctx, [{
                 "cmd": "LocationScouts",
-                "locations": list(self.local_scouted_locations),
+                "locations": new_ids,
                 "create_as_hint": int(2)
             }])
 
@@ -307,6 +335,15 @@ class DSZeldaClient(BizHawkClient):
         """
         return False
 
+    def process_paused_variable(self, read_result) -> bool:
+        """
+        whether the game is paused, or otherwise can't take an entrance. lets the client poll at the idle rate
+        after a while. the client never polls slower than the game rate without this
+        :param read_result: dict of all the read data
+        :return: is paused
+        """
+        return False
+
     async def process_in_menu(self, ctx):
         """
         Called while in menu
@@ -315,14 +352,55 @@ class DSZeldaClient(BizHawkClient):
         """
         pass
 
+    def start_trace_recording(self, path):
+        """
+        record connector traffic and context changes to a trace file, for replaying with recording.TraceReplay
+        :param path: trace file, compressed if it ends in .gz
+        """
+        from .recording import TraceRecorder
+        self.stop_trace_recording()
+        self.trace_recorder = TraceRecorder(path, self.clock)
+
+    def stop_trace_recording(self):
+        if self.trace_recorder is not None:
+            self.trace_recorder.close()
+            self.trace_recorder = None
+
     async def game_watcher(self, ctx: "BizHawkClientContext") -> None:
+        if self.trace_recorder is not None:
+            self.trace_recorder.start_cycle(ctx)
+        self.round_trips.attach(ctx.bizhawk_ctx)
+        self.round_trips.begin("cycle")
+        try:
+            with self.phase_timer.phase("cycle"):
+                await self._game_watcher(ctx)
+        except Exception:
+            # Still send what the cycle queued, but a failed send can't hide why the cycle failed
+            try:
+                await outbox(ctx).flush(ctx)
+            except Exception as e:
+                trace_logger.debug("Couldn't send queued messages, keeping them for next cycle: %s", e)
+            raise
+        else:
+            # Everything queued this cycle goes out in one send_msgs
+            await outbox(ctx).flush(ctx)
+        finally:
+            if self.trace_recorder is not None:
+                self.trace_recorder.end_cycle()
+            self.round_trips.end("cycle")
+
+    async def _game_watcher(self, ctx: "BizHawkClientContext") -> None:
         if not ctx.server or not ctx.server.socket.open or ctx.server.socket.closed or ctx.slot is None or ctx.slot == 0:
             self._just_entered_game = True
             self._loaded_menu_read_list = False
             self.last_scene = None
             self._from_menu = True
             self.er_in_scene = None
-            ctx.watcher_timeout = 0.5
+            self.er_index = None
+            self.round_trips.cancel("room_transition")
+            self.ut_scene_debouncer.reset()
+            self.local_scouted_locations.clear()
+            ctx.watcher_timeout = self.poll_scheduler.next_interval("menu")
             return
 
         # Enable "DeathLink" tag if option was enabled
@@ -333,14 +411,19 @@ class DSZeldaClient(BizHawkClient):
         # Get main read list before entering loop
         if not self._loaded_menu_read_list:
             await self.update_main_read_list(ctx, self.current_stage, in_game=False)
+            self._main_read_cache.invalidate()
             self._loaded_menu_read_list = True
+            trace_logger.debug("Startup times:\n%s", startup_report())
 
+        timer = self.phase_timer
         try:
             # if self.precision_mode:
             #     pass
 
             # Read main read list
-            read_result = await read_memory_values(ctx, self.main_read_list)
+            with timer.phase("main_read"):
+                read_result = await read_memory_values(ctx, self._main_read_cache.get(self.main_read_list,
+                                                                                      self.read_span_gap))
             self.read_result = read_result
 
             in_game = read_result["game_state"]
@@ -352,13 +435,20 @@ class DSZeldaClient(BizHawkClient):
             loading_scene = self.process_loading_variable(read_result)
             loading = loading_scene or self._entered_entrance
 
+            # Any load can move heap objects, reloading the same scene too
+            if loading_scene and not self._was_loading:
+                heap_resolver(ctx).invalidate()
+            self._was_loading = loading_scene
+
             # If player is on title screen, don't do anything else
             if not in_game or current_stage not in STAGES:
                 self._previous_game_state = False
+                heap_resolver(ctx).invalidate()
+                self.round_trips.cancel("room_transition")
                 self._from_menu = True
                 await self.process_in_menu(ctx)
-                ctx.watcher_timeout = 0.5
-                print("NOT IN GAME")
+                ctx.watcher_timeout = self.poll_scheduler.next_interval("menu")
+                trace_logger.debug("NOT IN GAME")
                 # Finished game?
                 if not ctx.finished_game:
                     await self._process_game_completion(ctx)
@@ -367,7 +457,7 @@ class DSZeldaClient(BizHawkClient):
             # While game from main menu
             if in_game and not self._previous_game_state:
                 if not await self.watched_intro_cs(ctx):
-                    print("In Intro CS")
+                    trace_logger.debug("In Intro CS")
                     return
                 self._just_entered_game = True
                 self.last_stage = None
@@ -377,10 +467,9 @@ class DSZeldaClient(BizHawkClient):
             if in_game and self._from_menu:
                 self._generate_er_map(ctx)
                 self._from_menu = False
-                ctx.watcher_timeout = 0.1  # 9 frame interval to catch 11 frame ER windows (old)
-                                           # 6 frame intervals to catch bounce timings
+                self.poll_scheduler.note_activity()
                 await self.enter_game(ctx)
-                print(f"Started Game")
+                trace_logger.debug("Started Game")
 
             # getting_location can be overwritten in process_read_list
             self.getting_location = read_result.get("getting_location", None)
@@ -395,12 +484,16 @@ class DSZeldaClient(BizHawkClient):
             num_received_items = read_result.get("received_item_index", None)
 
 
-            await self.process_read_list(ctx, read_result)
+            with timer.phase("process_read_list"):
+                await self.process_read_list(ctx, read_result)
 
             # Process on new room. As soon as it's triggered, changing the scene variable changes entrance destination
             if current_scene != self.last_scene and not self._entered_entrance and not self._loading_scene:
+                self.round_trips.begin("room_transition")  # Restarts the scope if the last transition never loaded
+                heap_resolver(ctx).invalidate()
                 # Trigger a different entrance to vanilla
-                current_stage, current_room, current_entrance = await self._entrance_warp(ctx, current_scene, current_entrance)
+                with timer.phase("entrance_warp"):
+                    current_stage, current_room, current_entrance = await self._entrance_warp(ctx, current_scene, current_entrance)
                 current_scene = current_stage * 0x100 + current_room
                 self.current_entrance = current_entrance
 
@@ -410,13 +503,14 @@ class DSZeldaClient(BizHawkClient):
                 # Send data to tracker
                 await self.ut_bounce_scene(ctx, current_scene)
 
-                # Set dynamic flags on scene
-                await self._reset_dynamic_flags(ctx)
-                await self._set_dynamic_flags(ctx, current_scene)
+                # Set dynamic flags on scene, with one read for all their bit checks
+                with timer.phase("dynamic_flags"):
+                    await self._update_dynamic_flags(ctx, current_scene)
 
 
 
-                self._entered_entrance = time.time()  # Triggered first part of loading - setting new room
+                self._entered_entrance = self.clock()  # Triggered first part of loading - setting new room
+                self.poll_scheduler.note_activity()
                 self.entering_dungeon = None
                 if self.delay_reset:
                     self.delay_reset = 0
@@ -431,34 +525,51 @@ class DSZeldaClient(BizHawkClient):
                         await self._set_starting_flags(ctx)
 
                 # Read for checks on specific global flags
-                if len(self.watches) > 0:
-                    watch_result = await read_memory_values(ctx, self.watches)
-                    for loc_name, prev_value in watch_result.items():
-                        loc_data = LOCATIONS_DATA[loc_name]
-                        if prev_value & loc_data["value"]:
-                            print(f"Got read item {loc_name} from address {loc_data['address']} "
-                                  f"looking at bit {loc_data['value']}")
+                with timer.phase("watches"):
+                    if len(self.watches) > 0:
+                        if self._watch_table is None or self._watch_table.is_stale(self.watches,
+                                                                                   self._watches_version):
+                            self._watch_table = WatchTable(self.watches, LOCATIONS_DATA, self.read_span_gap,
+                                                           self._watches_version)
+                        watch_result = await read_memory_values(ctx, self._watch_table.read_list)
+                        for loc_name in self._watch_table.fired(watch_result):
+                            # Processing an earlier one can take others out of watches
+                            if loc_name not in self.watches:
+                                continue
+                            loc_data = LOCATIONS_DATA[loc_name]
+                            location_logger.debug("Got read item %s from address %#x looking at bit %#x",
+                                                  loc_name, loc_data["address"], loc_data["value"])
 
                             force_remove = False
+                            self.poll_scheduler.note_activity()
                             await self._process_checked_locations(ctx, loc_name, force_remove)
                             self.receiving_location = True
                             self.watches.pop(loc_name)
+                            self.watches_changed()
 
                 # Check if link is getting location
-                if self.getting_location and not self.receiving_location and self.locations_in_scene is not None:
-                    self.receiving_location = True
-                    print("Receiving Item")
-                    if self.delay_reset > 1:
-                        self.delay_reset = 0
-                    await self._process_checked_locations(ctx, None, detection_type=self.getting_location_type)
+                with timer.phase("locations"):
+                    if self.getting_location and not self.receiving_location and self.locations_in_scene is not None:
+                        self.receiving_location = True
+                        self.poll_scheduler.note_activity()
+                        location_logger.debug("Receiving Item")
+                        if self.delay_reset > 1:
+                            self.delay_reset = 0
+                        await self._process_checked_locations(ctx, None, detection_type=self.getting_location_type)
 
                 # Process received items
-                if num_received_items is not None and num_received_items < len(ctx.items_received):
-                    if self._just_entered_game:
-                        self._log_received_items = True
-                    await self._process_received_items(ctx, num_received_items, self._log_received_items)
-                else:
-                    self._log_received_items = False
+                with timer.phase("received_items"):
+                    if num_received_items is not None and num_received_items < len(ctx.items_received):
+                        if self._just_entered_game:
+                            self._log_received_items = True
+                        self.poll_scheduler.note_activity()
+                        if (self.bulk_item_sync and not self.last_vanilla_item and
+                                len(ctx.items_received) - num_received_items >= self.bulk_item_sync_threshold):
+                            await self._process_received_items_bulk(ctx, num_received_items, self._log_received_items)
+                        else:
+                            await self._process_received_items(ctx, num_received_items, self._log_received_items)
+                    else:
+                        self._log_received_items = False
 
                 if num_received_items > len(ctx.items_received):
                     await write_memory_value(ctx, self.received_item_index_addr, len(ctx.items_received), size=2, overwrite=True)
@@ -472,11 +583,11 @@ class DSZeldaClient(BizHawkClient):
                     # Increment delay reset, probably haven't received item yet
                     if self.delay_reset == 1:
                         self.delay_reset += 1
-                        print(f"Delay Reset still active, {self.delay_reset}")
+                        location_logger.debug("Delay Reset still active, %s", self.delay_reset)
 
                     # Check for delayed pickup first!
                     elif self.delay_pickup is not None:
-                        print(f"Delay pickup {self.delay_pickup}")
+                        location_logger.debug("Delay pickup %s", self.delay_pickup)
                         fallback, pickups = self.delay_pickup
                         need_fallback = True
                         for location, item, value in pickups:
@@ -498,12 +609,13 @@ class DSZeldaClient(BizHawkClient):
 
                     # Remove vanilla item
                     elif self.last_vanilla_item:
-                        print("Item Received Successfully")
+                        item_logger.debug("Item Received Successfully")
                         await self._remove_vanilla_item(ctx, num_received_items)
 
 
                 await self.detect_warp_to_start(ctx, read_result)
-                await self.process_in_game(ctx, read_result)
+                with timer.phase("process_in_game"):
+                    await self.process_in_game(ctx, read_result)
 
                 self._just_entered_game = False
 
@@ -520,61 +632,79 @@ class DSZeldaClient(BizHawkClient):
                 self._loading_scene = True  # Second phase of loading room
                 self._entered_entrance = False
                 await self._set_er_coords(ctx)
-                print("Loading Scene", current_scene)
+                trace_logger.debug("Loading Scene %#x", current_scene)
 
             # Fully loaded room
             if self._loading_scene and not loading:
-                print("Fully Loaded Room", current_scene)
-                self._loading_scene = False
-                self._backup_coord_read = None
-
-                # Load potential entrance warp destinations, and dynamic entrances
-                self.er_in_scene = self.er_map.get(current_scene, dict())
-                await self._set_dynamic_entrances(ctx, current_scene)
-
-                print(f"Entered new scene {hex(current_scene)} with ER:")
-                for i, v in self.er_in_scene.items():
-                    print(f"\t{i} => {v} {i.exit}")
-
-                await self.process_on_room_load(ctx, current_scene, read_result)
-                await self._load_local_locations(ctx, current_scene)
-                await self._process_scouted_locations(ctx, current_scene)
-
-                # Check if entering dungeon
-                if current_stage in self.dungeon_key_data and self.last_stage != current_stage:
-                    self.entering_dungeon = current_stage
-                    self.entering_from = self.last_scene
-                else:
-                    self.entering_from = current_scene  # stage and room
+                with timer.phase("room_load"):
+                    trace_logger.debug("Fully Loaded Room %#x", current_scene)
+                    self.poll_scheduler.note_room_loaded()
+                    await self._publish_ut_scene(ctx, force=True)
+                    self._loading_scene = False
+                    self._backup_coord_read = None
+
+                    # Load potential entrance warp destinations, and dynamic entrances
+                    self.er_in_scene = self.er_map.get(current_scene, dict())
+                    self.er_index = None
+                    await self._set_dynamic_entrances(ctx, current_scene)
+
+                    if is_tracing("er"):
+                        er_logger.debug("Entered new scene %#x with ER:\n%s", current_scene,
+                                        "\n".join(f"\t{i} => {v} {i.exit}" for i, v in self.er_in_scene.items()))
+
+                    await self.process_on_room_load(ctx, current_scene, read_result)
+                    await self._load_local_locations(ctx, current_scene)
+                    await self._process_scouted_locations(ctx, current_scene)
+
+                    # Check if entering dungeon
+                    if current_stage in self.dungeon_key_data and self.last_stage != current_stage:
+                        self.entering_dungeon = current_stage
+                        self.entering_from = self.last_scene
+                    else:
+                        self.entering_from = current_scene  # stage and room
 
-                # Run entering stage code
-                if self.last_stage != current_stage:
-                    print("Fully Loaded Stage")
-                    await self._enter_stage(ctx, current_stage, current_scene)
-                    await self.update_main_read_list(ctx, current_stage)
+                    # Run entering stage code
+                    if self.last_stage != current_stage:
+                        trace_logger.debug("Fully Loaded Stage")
+                        heap_resolver(ctx).invalidate()
+                        await self._enter_stage(ctx, current_stage, current_scene)
+                        await self.update_main_read_list(ctx, current_stage)
+                        self._main_read_cache.invalidate()
 
-                # Hard coded room stuff
-                await self.process_hard_coded_rooms(ctx, current_scene)
+                    # Hard coded room stuff
+                    await self.process_hard_coded_rooms(ctx, current_scene)
+                    self.build_er_index()
 
-                self.last_stage = current_stage
-                self.last_scene = current_scene
-                print(f"Updated last scene!")
+                    self.last_stage = current_stage
+                    self.last_scene = current_scene
+                    trace_logger.debug("Updated last scene!")
+                self.round_trips.end("room_transition")
 
             self._previous_game_state = in_game
 
             # In case of a short load being missed, have a backup check on coords (they stay the same during transitions)
             if self._entered_entrance and self._backup_coord_read:
-                if time.time() - self._entered_entrance > 1:
+                if self.clock() - self._entered_entrance > 1:
                     if not loading_scene:
                         self._loading_scene = True  # Second phase of loading room
                         self._entered_entrance = False
-                        print("Missed loading read, using backup")
+                        trace_logger.debug("Missed loading read, using backup")
+                        self.poll_scheduler.note_missed_load()
+
+            await self._publish_ut_scene(ctx)
+
+            # Poll fast around entrances and loads, where the ER and bounce windows are 6-11 frames long
+            if self._entered_entrance or self._loading_scene:
+                poll_state = "transition"
+            else:
+                poll_state = "paused" if self.process_paused_variable(read_result) else "game"
+            ctx.watcher_timeout = self.poll_scheduler.next_interval(poll_state)
 
             # await bizhawk.unlock(ctx.bizhawk_ctx)
 
         except bizhawk.RequestFailedError:
             # Exit handler and return to main loop to reconnect
-            print("Couldn't read data")
+            trace_logger.debug("Couldn't read data")
 
     async def update_main_read_list(self, ctx: "BizHawkClientContext", stage: int, in_game=True):
         """
@@ -605,15 +735,14 @@ class DSZeldaClient(BizHawkClient):
                     # Create map from scene to entrance dataclass
                     res.setdefault(data.scene, {})
                     res[data.scene][data] = exit_data
-                    print(f"Creating scene data {hex(data.scene)}: {data} => {exit_data}")
+                    er_logger.debug("Creating scene data %#x: %s => %s", data.scene, data, exit_data)
                     res = self.add_special_er_data(ctx, res, data.scene, data, exit_data)
 
             self.er_map = res
-            print(f"ER Map:")
-            for scene, data in self.er_map.items():
-                print(f"\t{hex(scene)}")
-                for d2, d3 in data.items():
-                    print(f"\t\t{d2} => {d3}")
+            if is_tracing("er"):
+                er_logger.debug("ER Map:\n%s", "\n".join(
+                    f"\t{hex(scene)}\n" + "\n".join(f"\t\t{d2} => {d3}" for d2, d3 in data.items())
+                    for scene, data in self.er_map.items()))
 
 
 
@@ -640,7 +769,7 @@ class DSZeldaClient(BizHawkClient):
 
     async def _set_starting_flags(self, ctx: "BizHawkClientContext") -> None:
         write_list = [(self.slot_id_addr, split_bits(ctx.slot, 2), "Main RAM")]
-        print(f"New game, setting starting flags for slot {ctx.slot}")
+        trace_logger.debug("New game, setting starting flags for slot %s", ctx.slot)
         for adr, *value in STARTING_FLAGS:
             write_list.append((adr, value, "Main RAM"))
 
@@ -687,7 +816,7 @@ class DSZeldaClient(BizHawkClient):
 
             if exit_d.entrance[2] > 0xFA:
                 x, y, z = exit_d.coords
-                print(f"exit coords {x} {y} {z}")
+                er_logger.debug("exit coords %s %s %s", x, y, z)
                 self.er_exit_coord_writes = [(self.exit_coords_addr[0], split_bits(x, 4), "Main RAM"),
                                              (self.exit_coords_addr[1], split_bits(y, 4), "Main RAM"),
                                              (self.exit_coords_addr[2], split_bits(z, 4), "Main RAM")]
@@ -701,7 +830,8 @@ class DSZeldaClient(BizHawkClient):
             # Ship exits are weird
             if new_entrance[2] == 0xFA:
                 new_entrance = tuple(list(new_entrance[:2]) + [d.extra_data["ship_exit"]])
-            d.debug_print()
+            if is_tracing("er"):
+                d.debug_print()
             return write_er(d), new_entrance
 
         # if self.precision_mode:
@@ -724,36 +854,46 @@ class DSZeldaClient(BizHawkClient):
         elif self.er_in_scene:
 
             # Determine Entrance Warp
-            coords = await self.get_coords(ctx)
-            for detect_data, exit_data in self.er_in_scene.items():
-                print(f"trying to detect ER {res} {detect_data.entrance} {detect_data.detect_exit(going_to, entrance, coords, self.er_y_offest)}")
-                if detect_data.detect_exit(going_to, entrance, coords, self.er_y_offest):
-                    if await self.conditional_er(ctx, exit_data):
-                        print(f"Detected entrance: {detect_data} => {exit_data}")
-                        e_write_list, res = post_process(exit_data)
-                        defer_entrance = "traverse"
-                    else:
-                        e_write_list, res = post_process(detect_data)
-                        if ctx.slot_data.get("ut_blocked_entrances_behaviour", 0) in [0, 2]:
-                            defer_entrance = "check"
-                    break
+            if self.er_index is None or self.er_index.is_stale(self.er_in_scene):
+                self.build_er_index()
+            coords = await self.get_coords(ctx) if self.er_index.needs_coords(going_to, entrance) else None
+            detected = self.er_index.find(going_to, entrance, coords, self.er_y_offest)
+            er_logger.debug("trying to detect ER %s: %s", res, detected)
+            if detected:
+                detect_data, exit_data = detected
+                if await self.conditional_er(ctx, exit_data):
+                    er_logger.debug("Detected entrance: %s => %s", detect_data, exit_data)
+                    e_write_list, res = post_process(exit_data)
+                    defer_entrance = "traverse"
+                else:
+                    e_write_list, res = post_process(detect_data)
+                    if ctx.slot_data.get("ut_blocked_entrances_behaviour", 0) in [0, 2]:
+                        defer_entrance = "check"
 
         # Unrandomized entrances can still have bounce conditions
         if not e_write_list:
             bounce_entrance = await self.conditional_bounce(ctx, going_to, entrance)
-            print(f"Trying bounce: {bounce_entrance}")
+            er_logger.debug("Trying bounce: %s", bounce_entrance)
             if bounce_entrance:
                 e_write_list, res = post_process(bounce_entrance)
 
 
         if e_write_list:
-            print(f"Writing entrance warp {e_write_list}")
+            er_logger.debug("Writing entrance warp %s", e_write_list)
             await bizhawk.write(ctx.bizhawk_ctx, e_write_list)
         if defer_entrance:
             await self.store_visited_entrances(ctx, detect_data, exit_data, defer_entrance)
 
         return res
 
+    def build_er_index(self):
+        """
+        index er_in_scene for _entrance_warp. Happens when a room finishes loading, call it again if you change
+        er_in_scene in place later than that. Assigning a new er_in_scene is picked up by itself
+        :return:
+        """
+        self.er_index = EntranceIndex(self.er_in_scene or {})
+
     def write_respawn_entrance(self, exit_data):
         """
         when at sea in ph with island shuffle on, the respawn point is not tied to the exit and must be set manually.
@@ -791,49 +931,70 @@ class DSZeldaClient(BizHawkClient):
         """
         return True
 
-    async def _reset_dynamic_flags(self, ctx):
-        print(f"resetting flags {self._dynamic_flags_to_reset}")
+    async def _update_dynamic_flags(self, ctx, scene) -> list[tuple[int, list, str]]:
+        """
+        reset the last scene's dynamic flags and set the new scene's. Makes one read of every byte either touches
+        or checks whenever there are flags, and one write of only the bytes whose net value changed, if any did
+        :return: write list
+        """
         reset_data = [DYNAMIC_FLAGS[n] for n in self._dynamic_flags_to_reset]
-        res = await self._process_dynamic_flags(ctx, reset_data)
+        scene_data = self.scene_to_dynamic_flag.get(scene, [])
+        flag_logger.debug("resetting flags %s", self._dynamic_flags_to_reset)
+        if is_tracing("dynamic_flags") and scene_data:
+            flag_logger.debug("Flags on Scene: %s", [i['name'] for i in scene_data])
+
+        values = await self._read_dynamic_flag_bytes(ctx, reset_data + scene_data)
+        before = values.copy()
+        await self._plan_dynamic_flags(ctx, reset_data, values)
         self._dynamic_flags_to_reset.clear()
-        return res
+        await self._plan_dynamic_flags(ctx, scene_data, values, reset=True)
+        return await self._write_dynamic_flag_changes(ctx, before, values)
 
-    async def _set_dynamic_flags(self, ctx, scene):
-        # Loop dynamic flags in scene
-        if scene in self.scene_to_dynamic_flag:
-            print(f"Flags on Scene: {[i['name'] for i in self.scene_to_dynamic_flag[scene]]}")
-            return await self._process_dynamic_flags(ctx, self.scene_to_dynamic_flag[scene], True)
-        return []
-    # Main Loop
+    async def _read_dynamic_flag_bytes(self, ctx, flag_list) -> dict[int, int]:
+        """
+        read every byte a list of dynamic flags checks or writes, in one request. No request if there are none.
+        The game changes these bytes by itself, so they're read fresh on every update instead of kept between scenes
+        :return: address to value
+        """
+        addresses = set()
+        for data in flag_list:
+            addresses.update(self._get_dynamic_requirements(data).addresses)
+            for key in ["set_if_true", "unset_if_true", "overwrite_if_true"]:
+                addresses.update(a for a, _ in data.get(key, []))
+        if not addresses:
+            return {}
+        return await read_memory_values(ctx, {a: (a, 1, "Main RAM") for a in addresses})
 
-    async def _process_dynamic_flags(self, ctx, flag_list, reset=False):
-        read_addr = set()
+    async def _plan_dynamic_flags(self, ctx, flag_list, values: dict[int, int], reset=False):
+        """
+        apply a list of dynamic flags to `values` without writing anything.
+        Requirements are checked against `values` as they were before this list
+        :param values: from _read_dynamic_flag_bytes, updated in place
+        :param reset: queue the flags' reset_flags for the next scene
+        """
         set_bits, unset_bits = {}, {}
         for data in flag_list:
 
             # Items, locations, slot data
-            if not await self._has_dynamic_requirements(ctx, data):
+            if not await self._has_dynamic_requirements(ctx, data, values):
                 continue
 
-            # Create read/write lists
+            # Combine bits to set and unset
             for a, v in data.get("set_if_true", []):
-                read_addr.add(a)
                 # You can add an item name as a value, and it will set the value to it's count
                 if type(v) is str:
                     v = item_count(ctx, v)
                 set_bits[a] = set_bits.get(a, 0) | v
-                print(f"\tsetting bit for {data['name']}")
+                flag_logger.debug("\tsetting bit for %s", data['name'])
             for a, v in data.get("unset_if_true", []):
-                read_addr.add(a)
                 unset_bits[a] = unset_bits.get(a, 0) | v
-                print(f"\tunsetting bit for {data['name']}")
+                flag_logger.debug("\tunsetting bit for %s", data['name'])
             for a, v in data.get("overwrite_if_true", []):
-                read_addr.add(a)
                 if type(v) is str:
                     v = item_count(ctx, v)
                 set_bits[a] = v
                 unset_bits[a] = ~v
-                print(f"\toverwriting bit for {data['name']}")
+                flag_logger.debug("\toverwriting bit for %s", data['name'])
 
             # Special full heal condition
             if "full_heal" in data:
@@ -843,29 +1004,64 @@ class DSZeldaClient(BizHawkClient):
             if reset:
                 self._dynamic_flags_to_reset += data.get("reset_flags", [])
 
-        # Write dynamic flags to memory
-        read_list = {a: (a, 1, "Main RAM") for a in read_addr}
-        prev = await read_memory_values(ctx, read_list)
-        print(f"prevs: {[[hex(int(a)), hex(v)] for a, v in prev.items()]}")
-
-        # Calculate values to write
         for a, v in set_bits.items():
-            prev[a] = prev[a] | v
+            values[a] = values[a] | v
         for a, v in unset_bits.items():
-            prev[a] = prev[a] & (~v)
+            values[a] = values[a] & ~v
 
-        # Write
-        write_list = [(int(a), [v], "Main RAM") for a, v in prev.items()]
-        print(f"Dynaflags writes: {[[hex(a), [hex(i) for i in v]] for a, v, _ in write_list]}")
-        await bizhawk.write(ctx.bizhawk_ctx, write_list)
+    async def _write_dynamic_flag_changes(self, ctx, before: dict[int, int], values: dict[int, int]) \
+            -> list[tuple[int, list, str]]:
+        """
+        write the bytes that differ from what was read, merged into one request. No request if nothing changed
+        :return: write list
+        """
+        transaction = MemoryTransaction()
+        for a, v in values.items():
+            if v != before[a]:
+                transaction.overwrite(int(a), v)
+        write_list = await transaction.commit(ctx)
+        if is_tracing("dynamic_flags"):
+            flag_logger.debug("Dynaflags writes: %s", [[hex(a), [hex(i) for i in v]] for a, v, _ in write_list])
         return write_list
 
+    async def _reset_dynamic_flags(self, ctx):
+        """
+        deprecated, kept for subclasses. _update_dynamic_flags resets and sets in one read and write
+        """
+        flag_logger.debug("resetting flags %s", self._dynamic_flags_to_reset)
+        reset_data = [DYNAMIC_FLAGS[n] for n in self._dynamic_flags_to_reset]
+        res = await self._process_dynamic_flags(ctx, reset_data)
+        self._dynamic_flags_to_reset.clear()
+        return res
+
+    async def _set_dynamic_flags(self, ctx, scene):
+        """
+        deprecated, kept for subclasses. _update_dynamic_flags resets and sets in one read and write
+        """
+        if scene in self.scene_to_dynamic_flag:
+            if is_tracing("dynamic_flags"):
+                flag_logger.debug("Flags on Scene: %s", [i['name'] for i in self.scene_to_dynamic_flag[scene]])
+            return await self._process_dynamic_flags(ctx, self.scene_to_dynamic_flag[scene], True)
+        return []
+
+    async def _process_dynamic_flags(self, ctx, flag_list, reset=False):
+        """
+        deprecated, kept for subclasses. Reads, applies and writes one list of dynamic flags on its own
+        :return: write list
+        """
+        values = await self._read_dynamic_flag_bytes(ctx, flag_list)
+        before = values.copy()
+        await self._plan_dynamic_flags(ctx, flag_list, values, reset)
+        return await self._write_dynamic_flag_changes(ctx, before, values)
+
     async def _set_dynamic_entrances(self, ctx, scene):
-        print(f"Setting dynamic Entrances on {hex(scene)}:")
-        for data in DYNAMIC_ENTRANCES_BY_SCENE.get(scene, dict()).values():
+        flag_logger.debug("Setting dynamic Entrances on %#x:", scene)
+        entrance_data = list(DYNAMIC_ENTRANCES_BY_SCENE.get(scene, dict()).values())
+        bits = await self._read_requirement_bits(ctx, entrance_data)
+        for data in entrance_data:
 
             # Check requirements
-            if not await self._has_dynamic_requirements(ctx, data):
+            if not await self._has_dynamic_requirements(ctx, data, bits):
                 continue
 
             # Overwrite er_in_scene with dynamic entrance
@@ -875,131 +1071,67 @@ class DSZeldaClient(BizHawkClient):
                     self.er_in_scene[detect_data] = self.update_boss_warp(ctx, self.current_stage, scene)
             else:
                 self.er_in_scene[detect_data] = data["exit_data"]
-            print(f"\t{detect_data} => {data['exit_data']}")
-
-    async def _has_dynamic_requirements(self, ctx, data) -> bool:
-        def check_items(d):
-            if "has_items" in d:
-                counter = [0] * len(d["has_items"])
-                label = "has_items"
-            elif "not_has_all_items" in d:
-                counter = [0] * len(d["not_has_all_items"])
-                label = "not_has_all_items"
-            else:
-                return True
-
-            for has_item in ctx.items_received:
-                for i, want_item in enumerate(d[label]):
-                    if has_item.item == ITEMS_DATA[want_item[0]]["id"]:
-                        counter[i] += 1
-
-            for item, count_have in zip(d.get("has_items", []), counter):
-                item, count_want, *operation = item
-                if not operation:
-                    if (count_want == 0 and count_have != 0) or (count_want > 0 and count_have < count_want):
-                        return False
-                elif operation[0] == "has_exact":
-                    if count_want != count_have:
-                        return False
-                elif operation[0] == "not_has":
-                    if count_have >= count_want:
-                        return False
-
-            not_have_counter = 0
-            for item, count_have in zip(d.get("not_has_all_items", []), counter):
-                item, count_want, *operation = item
-                if count_have > count_want:
-                    not_have_counter += 1
-                if not_have_counter == len(counter):
-                    return False
-
-            return True
-
-        # Check location conditions
-        def check_locations(d):
-            for loc in d.get("has_locations", []):
-                if self.location_name_to_id[loc] not in ctx.checked_locations:
-                    return False
-            for loc in d.get("not_has_locations", []):
-                if self.location_name_to_id[loc] in ctx.checked_locations:
-                    return False
-            if "any_not_has_locations" in d:
-                for loc in d.get("any_not_has_locations", []):
-                    if self.location_name_to_id[loc] not in ctx.checked_locations:
-                        return True
-                return False
-            if "any_has_locations" in d:
-                for loc in d.get("any_has_locations", []):
-                    if self.location_name_to_id[loc] in ctx.checked_locations:
-                        return True
-                return False
-            return True
+            flag_logger.debug("\t%s => %s", detect_data, data['exit_data'])
 
-        def check_slot_data(d):
-            if "has_slot_data" in d:
-                for slot, value in d["has_slot_data"]:
-                    if type(value) is list:
-                        if ctx.slot_data.get(slot, None) not in value:
-                            return False
-                    else:
-                        if ctx.slot_data.get(slot, None) != value:
-                            return False
-            return True
+    def _compile_dynamic_requirements(self) -> dict[int, DynamicRequirements]:
+        all_data = list(DYNAMIC_FLAGS.values())
+        for scene_data in DYNAMIC_ENTRANCES_BY_SCENE.values():
+            all_data += list(scene_data.values())
+        return compile_requirements(all_data, ITEMS_DATA, self.location_name_to_id)
 
-        # Came from particular location
-        def check_last_room(d):
-            # print(f"checking last scene {self.last_scene} {d.get('last_scenes', [])}")
-            for i in d.get("not_last_scenes", []):
-                if self.last_scene == i:
-                    return False
-            for i in d.get("last_scenes", []):
-                if self.last_scene != i:
-                    return False
-            return True
+    def _get_dynamic_requirements(self, data) -> DynamicRequirements:
+        requirements = self.dynamic_requirements.get(id(data), None)
+        if requirements is None:
+            # Data that wasn't in the tables on startup, compile once and keep
+            requirements = DynamicRequirements(data, ITEMS_DATA, self.location_name_to_id)
+            self.dynamic_requirements[id(data)] = requirements
+        return requirements
 
-        # Read a dict of addresses to see if they match value
-        async def check_bits(d):
-            if "check_bits" in d:
-                r_list = {addr: (addr, 1, "Main RAM") for addr, _, *args in d["check_bits"]}
-                v_lookup = {addr: v for addr, v, *args in d["check_bits"]}
-                arg_lookup = {addr: args for addr, v, *args in d["check_bits"] if args}
-                values = await read_memory_values(ctx, r_list)
-                for addr, p in values.items():
-                    if not arg_lookup.get(addr, False):
-                        if not (p & v_lookup[addr]):
-                            return False
-                    elif "not" in arg_lookup[addr]:
-                        if p & v_lookup[addr]:
-                            return False
-            return True
+    async def _read_requirement_bits(self, ctx, data_list) -> dict[int, int]:
+        """
+        read every check_bits address for a list of dynamic flags or entrances in one request
+        :param ctx:
+        :param data_list: raw requirement data
+        :return: dict of address to value, to pass to _has_dynamic_requirements
+        """
+        addresses = set()
+        for data in data_list:
+            addresses.update(self._get_dynamic_requirements(data).addresses)
+        if not addresses:
+            return {}
+        return await read_memory_values(ctx, {addr: (addr, 1, "Main RAM") for addr in addresses})
 
-        def has_entrance(d):
-            if "not_on_entrance" in d:
-                if self.current_entrance in d["not_on_entrance"]:
-                    return False
-            if "on_entrance" in d:
-                if self.current_entrance not in d["on_entrance"]:
-                    return False
-            return True
+    async def _has_dynamic_requirements(self, ctx, data, bits: dict[int, int] | None = None) -> bool:
+        """
+        :param ctx:
+        :param data: raw requirement data
+        :param bits: snapshot from _read_requirement_bits. check_bits addresses missing from it get read here
+        :return: all requirements are met
+        """
+        requirements = self._get_dynamic_requirements(data)
 
-        if not check_items(data):
-            print(f"\t{data['name']} does not have item reqs")
-            return False
-        if not check_locations(data):
-            print(f"\t{data['name']} does not have location reqs")
+        if not requirements.check_items(received_item_index(ctx)):
+            flag_logger.debug("\t%s does not have item reqs", requirements.name)
             return False
-        if not check_slot_data(data):
-            print(f"\t{data['name']} does not have slot data reqs")
+        if not requirements.check_locations(ctx.checked_locations):
+            flag_logger.debug("\t%s does not have location reqs", requirements.name)
             return False
-        if not check_last_room(data):
-            print(f"\t{data['name']} came from wrong room {hex(self.last_scene)}")
+        if not requirements.check_slot_data(ctx.slot_data):
+            flag_logger.debug("\t%s does not have slot data reqs", requirements.name)
             return False
-        if not await check_bits(data):
-            print(f"\t{data['name']} is missing bits")
+        if not requirements.check_last_room(self.last_scene):
+            flag_logger.debug("\t%s came from wrong room %s", requirements.name, self.last_scene)
             return False
+        if requirements.addresses:
+            # Read a dict of addresses to see if they match value
+            if bits is None or not all(addr in bits for addr in requirements.addresses):
+                bits = await read_memory_values(ctx, {addr: (addr, 1, "Main RAM") for addr in requirements.addresses})
+            if not requirements.check_bits(bits):
+                flag_logger.debug("\t%s is missing bits", requirements.name)
+                return False
         if not await self.has_special_dynamic_requirements(ctx, data):
             return False
-        if not has_entrance(data):
+        if not requirements.check_entrance(self.current_entrance):
             return False
 
         return True
@@ -1028,60 +1160,53 @@ class DSZeldaClient(BizHawkClient):
             if r or (loc_id not in all_checked_locations):
                 await self._set_vanilla_item(ctx, location, item)
                 local_checked_locations.add(loc_id)
-            print(f"pre-processed {pre_process}, vanill {self.last_vanilla_item}")
+            location_logger.debug("pre-processed %s, vanill %s", pre_process, self.last_vanilla_item)
         else:
             # Get link's coords
             link_coords = await self.get_coords(ctx)
 
-            # Certain checks use their detection method to differentiate them, like frogs and salvage
-            locations_in_scene = self.locations_in_scene.copy()
-
-            # Figure out what check was just gotten
-            for i, loc in enumerate(locations_in_scene.items()):
-                loc_name, location = loc
-                loc_bytes = self.location_name_to_id[loc_name]
-
-                if "address" in location or self.cancel_location_read(location):
+            # Figure out what check was just gotten, from the locations whose bounds Link is in
+            if self.location_grid is None or self.location_grid.is_stale(self.locations_in_scene):
+                self.build_location_grid()
+            for loc_name in self.location_grid.find(link_coords):
+                # Certain checks use their detection method to differentiate them, like frogs and salvage
+                location = self.locations_in_scene.get(loc_name, None)
+                if location is None or self.cancel_location_read(location):
+                    location = None
                     continue
+                loc_bytes = self.location_name_to_id[loc_name]
+                location_logger.debug("Processing locs %s at %s", loc_name, link_coords)
 
-                print(f"Processing locs {loc_name}")
-                print(
-                    f"\t{location.get('x_max', 0x8FFFFFFF)} > {link_coords['x']} > {location.get('x_min', -0x8FFFFFFF)}")
-                print(
-                    f"\t{location.get('z_max', 0x8FFFFFFF)} > {link_coords['z']} > {location.get('z_min', -0x8FFFFFFF)}")
-
-                if (location.get("x_max", 0x8FFFFFFF) > link_coords["x"] > location.get("x_min", -0x8FFFFFFF) and
-                        location.get("z_max", 0x8FFFFFFF) > link_coords["z"] > location.get("z_min", -0x8FFFFFFF) and
-                        location.get("y", link_coords["y"]) == link_coords["y"]):
-                    # For rooms with checks that move or are close, check what you got first
-                    if "delay_pickup" in location:
-                        if len(self.locations_in_scene) > i + 1:
-                            await self._set_delay_pickup(ctx, loc_name, location)
-                            break
+                # For rooms with checks that move or are close, check what you got first
+                if "delay_pickup" in location:
+                    if loc_name != next(reversed(self.locations_in_scene)):
+                        await self._set_delay_pickup(ctx, loc_name, location)
+                        break
 
-                    local_checked_locations.add(loc_bytes)
-                    await self._set_vanilla_item(ctx, location)
-                    print(f"Got location {loc_name}! with vanilla {self.last_vanilla_item} id {loc_bytes}")
-                    self.locations_in_scene.pop(loc_name)  # Remove location for overlapping purposes
-                    break
-                location = None
+                local_checked_locations.add(loc_bytes)
+                await self._set_vanilla_item(ctx, location)
+                location_logger.debug("Got location %s! with vanilla %s id %s", loc_name, self.last_vanilla_item, loc_bytes)
+                self.locations_in_scene.pop(loc_name)  # Remove location for overlapping purposes
+                break
 
         if location is not None:
             if "set_bit" in location:
+                transaction = MemoryTransaction()
                 for addr, bit in location["set_bit"]:
-                    print(f"Setting bit {bit} for location vanil {location['vanilla_item']}")
-                    await write_memory_value(ctx, addr, bit)
+                    location_logger.debug("Setting bit %s for location vanil %s", bit, location['vanilla_item'])
+                    transaction.set_bits(addr, bit)
+                await transaction.commit(ctx)
 
             # Delay reset of vanilla item from certain address reads
             if "delay_reset" in location:
                 self.delay_reset = 1
-                print(f"Started Delay Reset for {self.last_vanilla_item}")
+                location_logger.debug("Started Delay Reset for %s", self.last_vanilla_item)
 
         # Send locations
         # print(f"Local locations: {local_checked_locations} in \n{all_checked_locations}")
         if any([i not in all_checked_locations for i in local_checked_locations]):
-            print(f"Sending Locations: {local_checked_locations}")
-            await ctx.send_msgs([{
+            location_logger.debug("Sending Locations: %s", local_checked_locations)
+            await queue_msgs(ctx, [{
                 "cmd": "LocationChecks",
                 "locations": list(local_checked_locations)
             }])
@@ -1120,17 +1245,17 @@ class DSZeldaClient(BizHawkClient):
                 delay_item_check = [delay_item_check]
             for item in delay_item_check:
                 self.delay_pickup[1].append([loc, item, await self.get_item_read(ctx, item)])
-        print(f"Delay pickup {self.delay_pickup}")
+        location_logger.debug("Delay pickup %s", self.delay_pickup)
     # Processes events defined in data\dynamic_flags.py
 
     async def _set_vanilla_item(self, ctx, location, vanilla_item: str | None = None):
         item: str | list[str] = vanilla_item or location["vanilla_item"]
         if isinstance(item, str):
             item_data = ITEMS_DATA[item]
-            print(f"Setting vanilla for {item} {item_data}")
+            location_logger.debug("Setting vanilla for %s %s", item, item_data)
             if item is not None and not item_data.get("dummy", False):
                 if ("incremental" in item_data or "progressive" in item_data or
-                        item_data["id"] not in [i.item for i in ctx.items_received] or
+                        item_data["id"] not in received_item_index(ctx) or
                         "always_process" in item_data):
                     self.last_vanilla_item.append(item)
 
@@ -1165,24 +1290,90 @@ class DSZeldaClient(BizHawkClient):
     async def _process_received_items(self, ctx: "BizHawkClientContext", num_received_items: int, log_items=False) -> None:
         # If the game hasn't received all items yet and the received item struct doesn't contain an item, then
         # fill it with the next item
+        transaction = MemoryTransaction()
+        item_name, item_data = await self._queue_received_item(ctx, transaction, num_received_items, log_items)
+
+        # Increment in-game items received count
+        transaction.overwrite(self.received_item_index_addr, num_received_items + 1, size=2)
+
+        # Write the new item to memory!
+        write_list = await transaction.commit(ctx)
+        if is_tracing("items"):
+            item_logger.debug("Write list:\n%s", "\n".join(f"  {hex(addr)}: {value} ({domain})"
+                                                          for addr, value, domain in write_list))
+
+        await self.receive_item_post_processing(ctx, item_name, item_data)
+
+    async def _process_received_items_bulk(self, ctx: "BizHawkClientContext", num_received_items: int,
+                                           log_items=False) -> None:
+        """
+        give every item from num_received_items to the end of ctx.items_received at once.
+        runs of items that can_bulk_receive allows are queued on one transaction and written in one commit together
+        with the new item index. other items are given one at a time in between, so hooks see the memory they expect.
+        queue_special_items gets called for every bulk item with the run's transaction, so its ops see earlier items.
+        games that still override receive_special_items get the run committed before every item instead, since that
+        hook reads memory and returns plain overwrites. they get the whole backlog in one cycle, one commit per item
+        :param ctx:
+        :param num_received_items: in game received item index
+        :param log_items: log every item received
+        :return:
+        """
+        transaction = MemoryTransaction()
+        received = []
+        legacy_hook = type(self).receive_special_items is not DSZeldaClient.receive_special_items
+
+        async def commit_run(item_index):
+            nonlocal transaction
+            if not received:
+                return
+            transaction.overwrite(self.received_item_index_addr, item_index, size=2)
+            write_list = await transaction.commit(ctx)
+            transaction = MemoryTransaction()
+            item_logger.debug("Bulk received %s items with %s writes", len(received), len(write_list))
+            for name, data in received:
+                await self.receive_item_post_processing(ctx, name, data)
+            received.clear()
+
+        for i in range(num_received_items, len(ctx.items_received)):
+            item_name = self.item_id_to_name[ctx.items_received[i].item]
+            if self.can_bulk_receive(item_name, ITEMS_DATA[item_name]):
+                if legacy_hook:
+                    await commit_run(i)
+                received.append(await self._queue_received_item(ctx, transaction, i, log_items))
+            else:
+                await commit_run(i)
+                await self._process_received_items(ctx, i, log_items)
+        await commit_run(len(ctx.items_received))
+
+    def can_bulk_receive(self, item_name: str, item_data: dict) -> bool:
+        """
+        whether an item can be given as part of a bulk receive, see _process_received_items_bulk.
+        items with memory reading hooks, or that only a game hook knows how to give, need to be given alone
+        :param item_name:
+        :param item_data:
+        :return: item can be bulk received
+        """
+        if "Small Key" in item_name or item_name == "Heart Container" or "always_process" in item_data:
+            return False
+        if type(item_data.get("value", 1)) is str:
+            return False
+        return "refill" in item_data or "address" in item_data or "progressive" in item_data
+
+    async def _queue_received_item(self, ctx: "BizHawkClientContext", transaction: MemoryTransaction,
+                                   num_received_items: int, log_items=False) -> tuple[str, dict]:
         next_item = ctx.items_received[num_received_items].item
         item_name = self.item_id_to_name[next_item]
         item_data = ITEMS_DATA[item_name]
-        item_value = 0
 
         if log_items:
             logger.info(f"Received Backlogged Item: {item_name}")
-
-        # Increment in-game items received count
-        received_item_address = self.received_item_index_addr
-        write_list = [(received_item_address, split_bits(num_received_items + 1, 2), "Main RAM")]
-        print(f"Vanilla item: {self.last_vanilla_item} for {item_name}")
+        item_logger.debug("Vanilla item: %s for %s", self.last_vanilla_item, item_name)
 
         # If same as vanilla item don't remove
         if self.last_vanilla_item and item_name == self.last_vanilla_item[-1] and "always_process" not in item_data:
             self.last_vanilla_item.pop()
-            print(f"oops it's vanilla or dummy! {self.last_vanilla_item}")
-            write_list += await self.write_totok_keys_lol(ctx, item_name, item_data)
+            item_logger.debug("oops it's vanilla or dummy! %s", self.last_vanilla_item)
+            transaction.extend(await self.write_totok_keys_lol(ctx, item_name, item_data))
 
         # Handle Small Keys
         elif "Small Key" in item_name:
@@ -1193,47 +1384,43 @@ class DSZeldaClient(BizHawkClient):
                 bit_filter = key_data["filter"]
                 new_v = prev | bit_filter if (prev & bit_filter) + key_data[
                     "value"] > bit_filter else prev + key_data["value"]
-                print(f"Writing {key_data['name']} key to storage: {hex(prev)} -> {hex(new_v)}")
+                item_logger.debug("Writing %s key to storage: %#x -> %#x", key_data['name'], prev, new_v)
                 return key_data["address"], [new_v], "Main RAM"
 
             # Get key in own dungeon
             if self.current_stage == item_data["dungeon"]:
-                print("In dungeon! Getting Key")
+                item_logger.debug("In dungeon! Getting Key")
                 self.key_value = await read_memory_value(ctx, self.key_address)
                 self.key_value = 7 if self.key_value > 7 else self.key_value
-                write_list.append((self.key_address, [self.key_value + 1], "Main RAM"))
-                write_list += await self.receive_key_in_own_dungeon(ctx, item_name, write_keys_to_storage)
+                transaction.overwrite(self.key_address, self.key_value + 1)
+                transaction.extend(await self.receive_key_in_own_dungeon(ctx, item_name, write_keys_to_storage))
 
             # Get key elsewhere
             else:
-                write_list.append(await write_keys_to_storage(item_data["dungeon"]))
+                transaction.extend([await write_keys_to_storage(item_data["dungeon"])])
 
             # Extra key operations, in ph writing totok midway keys
-            write_list += await self.received_special_small_keys(ctx, item_name, write_keys_to_storage)
+            transaction.extend(await self.received_special_small_keys(ctx, item_name, write_keys_to_storage))
 
         # Handle ammo refills
         elif "refill" in item_data:
             refill_id = ITEMS_DATA[item_data["refill"]]["id"]
-            prog_received = min(sum([1 for i in ctx.items_received[:num_received_items] if i.item == refill_id]),
+            prog_received = min(received_item_index(ctx).count(refill_id, num_received_items),
                                 len(item_data["give_ammo"])) - 1
             if prog_received >= 0:
-                write_list.append((item_data["address"], [item_data["give_ammo"][prog_received]], "Main RAM"))
+                transaction.overwrite(item_data["address"], item_data["give_ammo"][prog_received])
 
         elif "address" in item_data or "progressive" in item_data:
             # Handle progressive items (not to be confused with progression items)
             prog_received = 0
             if "progressive" in item_data:
-                prog_received = min(sum([1 for i in ctx.items_received[:num_received_items] if i.item == next_item]),
+                prog_received = min(received_item_index(ctx).count(next_item, num_received_items),
                                     len(item_data["progressive"]) - 1)
                 item_address, item_value = item_data["progressive"][prog_received]
             else:
                 item_address = item_data["address"]
 
-            # Read address item is to be written to
-            prev_value = await read_memory_value(ctx, item_address, domain="Main RAM",
-                                                 size=item_data.get("size", 1))
-
-            # Handle different writing operations
+            # Handle different writing operations, on the value at the address the item is written to
             if "incremental" in item_data:
                 if type(item_data.get("value", 1)) is str:
                     value = await self.received_special_incremental(ctx, item_data)
@@ -1244,45 +1431,36 @@ class DSZeldaClient(BizHawkClient):
                     if item_name == "Heart Container":
                         await self.full_heal(ctx)
 
-                item_value = prev_value + value
-                item_value = 0 if item_value <= 0 else item_value
-                if "Rupee" in item_name:
-                    item_value = min(item_value, 9999)
-                if "size" in item_data:
-                    item_value = split_bits(item_value, item_data["size"])
-                if "max" in item_data and item_value > item_data["max"]:
-                    item_value = min(item_data["max"], prev_value)
+                def increment_item(prev_value):
+                    new_value = prev_value + value
+                    new_value = 0 if new_value <= 0 else new_value
+                    if "Rupee" in item_name:
+                        new_value = min(new_value, 9999)
+                    if "size" in item_data:
+                        return new_value
+                    if "max" in item_data and new_value > item_data["max"]:
+                        new_value = min(item_data["max"], prev_value)
+                    return min(255, new_value)
+
+                transaction.update(item_address, increment_item, size=item_data.get("size", 1))
             elif "progressive" in item_data:
                 if "progressive_overwrite" in item_data and prog_received >= 1:
-                    item_value = item_value  # Bomb upgrades need to overwrite of everything breaks
+                    transaction.overwrite(item_address, item_value)  # Bomb upgrades need to overwrite of everything breaks
                 else:
-                    item_value = prev_value | item_value
+                    transaction.set_bits(item_address, item_value)
             else:
-                item_value = prev_value | item_data["value"]
-
-            item_values = item_value if type(item_value) is list else [item_value]
-            item_values = [min(255, i) for i in item_values]
-            write_list.append((item_address, item_values, "Main RAM"))
+                transaction.set_bits(item_address, item_data["value"])
 
             # Handle special item conditions
             if "give_ammo" in item_data:
-                write_list.append((item_data["ammo_address"], [item_data["give_ammo"][prog_received]], "Main RAM"))
+                transaction.overwrite(item_data["ammo_address"], item_data["give_ammo"][prog_received])
             if "set_bit" in item_data:
                 for adr, bit in item_data["set_bit"]:
-                    bit_prev = await read_memory_value(ctx, adr)
-                    write_list.append((adr, [bit | bit_prev], "Main RAM"))
+                    transaction.set_bits(adr, bit)
 
         # Special game-specific items
-        write_list += await self.receive_special_items(ctx, item_name, item_data)
-
-        # Write the new item to memory!
-        print("Write list:")
-        for addr, value, domain in write_list:
-            print(f"  {hex(addr)}: {value} ({domain})")
-        # print(f"Write list: {write_list}")
-        await bizhawk.write(ctx.bizhawk_ctx, write_list)
-
-        await self.receive_item_post_processing(ctx, item_name, item_data)
+        await self.queue_special_items(ctx, transaction, item_name, item_data)
+        return item_name, item_data
     # Called when a stage has fully loaded
 
     async def receive_key_in_own_dungeon(self, ctx, item_name: str, write_keys_to_storage) -> list:
@@ -1337,6 +1515,19 @@ class DSZeldaClient(BizHawkClient):
         """
         return []
 
+    async def queue_special_items(self, ctx, transaction: MemoryTransaction, item_name, item_data):
+        """
+        called in `_process_received_items` for adding custom item cases, as operations on the item's transaction.
+        when bulk receiving, earlier items of the run are queued on the same transaction, so use increment/set_bits
+        or update instead of reading memory yourself. by default merges in receive_special_items' write list
+        :param ctx:
+        :param transaction:
+        :param item_name:
+        :param item_data:
+        :return:
+        """
+        transaction.extend(await self.receive_special_items(ctx, item_name, item_data))
+
     async def receive_item_post_processing(self, ctx, item_name, item_data):
         """
         called at the end of `_process_received_items`. for calling other functions on getting items.
@@ -1351,7 +1542,8 @@ class DSZeldaClient(BizHawkClient):
     # Set checks to look for inventory changes
 
     async def _remove_vanilla_item(self, ctx: "BizHawkClientContext", num_received_items):
-        print(f"Removing vanilla items {self.last_vanilla_item}")
+        item_logger.debug("Removing vanilla items %s", self.last_vanilla_item)
+        transaction = MemoryTransaction()
         for item in self.last_vanilla_item:
             if isinstance(item, str):
                 # Handle game specific items
@@ -1362,20 +1554,18 @@ class DSZeldaClient(BizHawkClient):
                     value = data.get('value', 1)
                     if "Small Key" in item:
                         address = self.key_address = await self.get_small_key_address(ctx)
-                        print("small key?")
+                        item_logger.debug("small key?")
                     elif "progressive" in data:
-                        write_list = []
-                        index = sum([1 for i in ctx.items_received[:num_received_items] if i.item == data["id"]])
+                        index = received_item_index(ctx).count(data["id"], num_received_items)
                         if index >= len(data["progressive"]):
                             continue
                         address, value = data["progressive"][index]
                         if "give_ammo" in data:
                             ammo_v = data["give_ammo"][min(max(index - 1, 0), len(data["give_ammo"])-1)]
-                            write_list.append((data["ammo_address"], [ammo_v], "Main RAM"))
+                            transaction.overwrite(data["ammo_address"], ammo_v)
                         # Progressive overwrite fix
                         if "progressive_overwrite" in data and index > 1:
-                            write_list.append((data["progressive"][index-1][0], [data["progressive"][index-1][1]], "Main RAM"))
-                        await bizhawk.write(ctx.bizhawk_ctx, write_list)
+                            transaction.overwrite(data["progressive"][index-1][0], data["progressive"][index-1][1])
                     else:
                         address, value = data["address"], data.get("value", 1)
 
@@ -1384,11 +1574,18 @@ class DSZeldaClient(BizHawkClient):
                         if self.prev_rupee_count + value > 9999:
                             value =  9999 - self.prev_rupee_count
 
-                    await write_memory_value(ctx, address, value,
-                                             incr=data.get('incremental', None), unset=True, size=data.get("size", 1))
+                    size = data.get("size", 1)
+                    if data.get("incremental", None) is not None:
+                        # Unset increments are subtracted, see write_memory_value
+                        transaction.increment(address, -value if data["incremental"] else value, size)
+                    else:
+                        transaction.unset_bits(address, value, size)
 
             # If item is a list of items, we instead want to check which one Link got and loop that back into this process
             else:
+                # Removals so far could change the reads
+                await transaction.commit(ctx)
+                transaction = MemoryTransaction()
                 for _item, _count in item:
                     new_item_read = await self.get_item_read(ctx, _item)
                     if "Rupee" in item:
@@ -1399,6 +1596,7 @@ class DSZeldaClient(BizHawkClient):
                         self.last_vanilla_item.append(_item)
                         break
 
+        await transaction.commit(ctx)
         self.last_vanilla_item.clear()
     # Called during location processing to determine what vanilla item to remove
 
@@ -1501,10 +1699,27 @@ class DSZeldaClient(BizHawkClient):
         """
         return None
 
+    def build_location_grid(self):
+        """
+        index locations_in_scene for coordinate based detection. Happens on the first pickup in a scene, and again
+        when locations_in_scene is replaced or grows. Call it yourself if you change a location's bounds in place
+        :return:
+        """
+        self.location_grid = LocationGrid(self.locations_in_scene or {})
+
+    def watches_changed(self):
+        """
+        call after adding to or removing from self.watches in place, so the next cycle recompiles them right away.
+        changes are also found by comparing the watches, this only skips that
+        :return:
+        """
+        self._watches_version += 1
+
     async def _load_local_locations(self, ctx, scene):
         # Load locations in room into loop
         self.locations_in_scene = self.location_area_to_watches.get(scene, {}).copy()
-        print(f"Locations in scene {scene}: {self.locations_in_scene.keys()}")
+        self.location_grid = None  # Built on the first pickup, after the room load hooks had their go at the locations
+        location_logger.debug("Locations in scene %s: %s", scene, self.locations_in_scene.keys())
         self.watches = {}
         sram_read_list = {}
         locations_found = ctx.checked_locations
@@ -1516,15 +1731,16 @@ class DSZeldaClient(BizHawkClient):
                     if "address" in location:
                         read = await read_memory_value(ctx, location["address"])
                         if read & location["value"]:
-                            print(f"Location {loc_name} has already been found and triggered")
+                            location_logger.debug("Location %s has already been found and triggered", loc_name)
                             continue
                 else:
                     if "sram_addr" in location and location["sram_addr"] is not None:
                         sram_read_list[loc_name] = (location["sram_addr"], 1, "SRAM")
-                        print(f"\tCreated sram read for loacation {loc_name}")
+                        location_logger.debug("\tCreated sram read for loacation %s", loc_name)
 
                 if "address" in location:
                     self.watches[loc_name] = (location["address"], 1, "Main RAM")
+            self.watches_changed()
 
             # Read and set locations missed when bizhawk was disconnected
             if self.save_slot == 0 and len(sram_read_list) > 0:
@@ -1574,13 +1790,15 @@ class DSZeldaClient(BizHawkClient):
                 reset_tracker = (~key_data["filter"]) & key_values["tracker"]
                 write_list += [(key_data["address"], [reset_tracker], "Main RAM")]
 
-            print(f"Finally writing keys to memory {hex(key_address)} with value {hex(new_keys)}")
+            item_logger.debug("Finally writing keys to memory %#x with value %#x", key_address, new_keys)
             await bizhawk.write(ctx.bizhawk_ctx, write_list)
 
     async def _process_scouted_locations(self, ctx: "BizHawkClientContext", scene):
+        received = received_item_index(ctx)
+
         def check_items(d):
             for item in d.get("has_items", []):
-                if ITEMS_DATA[item]["id"] not in [i.item for i in ctx.items_received]:
+                if ITEMS_DATA[item]["id"] not in received:
                     return False
             return True
 
@@ -1595,44 +1813,51 @@ class DSZeldaClient(BizHawkClient):
                     return False
             return True
 
-        local_scouted_locations = set(ctx.locations_scouted)
-        if self.hint_scene_to_watches.get(scene, []):
-            print(f"hints {self.hint_scene_to_watches.get(scene, [])}")
-        for hint_name in self.hint_scene_to_watches.get(scene, []):
-            hint_data = self.hint_data[hint_name]
+        candidates = self._get_hint_candidates(scene)
+        if candidates:
+            location_logger.debug("hints %s", self.hint_scene_to_watches[scene])
+        to_scout = []
+        for hint_name, hint_data, location_ids in candidates:
             # Check requirements
             if not check_items(hint_data):
                 continue
             if not check_slot_data(hint_data):
                 continue
 
-            # Figure out locations to hint
-            if "locations" in hint_data:
-                # Hint required dungeons
-                if "Dungeon Hints" in hint_data["locations"]:
-                    local_scouted_locations.update(self.dungeon_hints(ctx))
-                else:
-                    locations_checked = ctx.locations_scouted
-                    for loc in hint_data["locations"]:
-                        loc_id = self.location_name_to_id[loc]
-                        if loc_id in locations_checked:
-                            continue
-                        local_scouted_locations.add(loc_id)
+            # Hint required dungeons
+            if location_ids is None:
+                to_scout += self.dungeon_hints(ctx)
             else:
-                local_scouted_locations.add(self.location_name_to_id[hint_name])
+                to_scout += location_ids
 
         # Send hints
-        if self.local_scouted_locations != local_scouted_locations:
-            self.local_scouted_locations = local_scouted_locations
-            await ctx.send_msgs([{
-                "cmd": "LocationScouts",
-                "locations": list(self.local_scouted_locations),
-                "create_as_hint": int(2)
-            }])
+        await self._request_scouts(ctx, to_scout)
+
+    def _get_hint_candidates(self, scene) -> list[tuple[str, dict, tuple[int, ...] | None]]:
+        """
+        hints in a scene, with the location ids each one scouts (None for dungeon hints).
+        Kept per scene until hint_data gets replaced
+        """
+        if self._hint_candidates_source is not self.hint_data:
+            self._hint_candidates = {}
+            self._hint_candidates_source = self.hint_data
+        candidates = self._hint_candidates.get(scene, None)
+        if candidates is None:
+            candidates = self._hint_candidates[scene] = []
+            for hint_name in self.hint_scene_to_watches.get(scene, []):
+                hint_data = self.hint_data[hint_name]
+                if "locations" not in hint_data:
+                    location_ids = (self.location_name_to_id[hint_name],)
+                elif "Dungeon Hints" in hint_data["locations"]:
+                    location_ids = None
+                else:
+                    location_ids = tuple(self.location_name_to_id[loc] for loc in hint_data["locations"])
+                candidates.append((hint_name, hint_data, location_ids))
+        return candidates
 
     async def _process_game_completion(self, ctx: "BizHawkClientContext"):
         if await self.process_game_completion(ctx):
-            await ctx.send_msgs([{
+            await queue_msgs(ctx, [{
                 "cmd": "StatusUpdate",
                 "status": ClientStatus.CLIENT_GOAL
             }])
@@ -1648,19 +1873,25 @@ class DSZeldaClient(BizHawkClient):
         """
 
     @staticmethod
-    async def store_data(ctx: "BizHawkClientContext", key, data, operation="update"):
-        await ctx.send_msgs([{
+    async def store_data(ctx: "BizHawkClientContext", key, data, operation="update", immediate=False):
+        await queue_msgs(ctx, [{
             "cmd": "Set",
             "key": key,
             "default": set(),
             "operations": [{"operation": operation, "value": list(data)}]
-        }])
+        }], immediate)
 
     async def ut_bounce_scene(self, ctx, scene):
         if ctx.slot_data.get("shuffle_overworld_transitions", False):
             scene |= 1 << 16
-        print(f"Storing new scene for UT {hex(scene)}")
-        await ctx.send_msgs([{
+        self.ut_scene_debouncer.update(scene)
+
+    async def _publish_ut_scene(self, ctx, force=False):
+        scene = self.ut_scene_debouncer.take(force)
+        if scene is None:
+            return
+        trace_logger.debug("Storing new scene for UT %#x", scene)
+        await queue_msgs(ctx, [{
             "cmd": "Set",
             "key": f"{ctx.slot}_{ctx.team}_UT_MAP",
             "default": 0,
@@ -0,0 +1,190 @@
+import os
+import sys
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from . import memory, io_hooks
+from .io_hooks import ConnectorHook, add_hook, remove_hook
+from .tracing import memory_logger
+
+# Generic helpers that are never the interesting call site, the caller of these is
+HELPER_FUNCTIONS = {"read_memory_value", "read_memory_values", "write_memory_value", "write_memory_values"}
+_SKIP_FILES = {os.path.normcase(__file__), os.path.normcase(memory.__file__), os.path.normcase(io_hooks.__file__)}
+
+
+class RoundTripBudgetExceeded(Exception):
+    pass
+
+
+class RoundTrips:
+    """
+    Connector traffic within one scope, like a game_watcher cycle or a room transition.
+    `sites` counts round trips by "file:function:line" of the code that asked for them.
+    """
+    __slots__ = ("name", "reads", "writes", "bytes_read", "bytes_written", "sites")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.reads = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.sites = Counter()
+
+    @property
+    def total(self) -> int:
+        return self.reads + self.writes
+
+    def __str__(self):
+        sites = ", ".join(f"{site} x{count}" for site, count in self.sites.most_common())
+        return (f"{self.name}: {self.total} round trips ({self.reads} reads {self.bytes_read}B, "
+                f"{self.writes} writes {self.bytes_written}B) from {sites or 'nowhere'}")
+
+
+def _call_site() -> str:
+    frame = sys._getframe(2)
+    # Other connector hooks in the chain aren't the call site either
+    while frame is not None and (frame.f_code.co_name in HELPER_FUNCTIONS or
+                                 os.path.normcase(frame.f_code.co_filename) in _SKIP_FILES or
+                                 isinstance(frame.f_locals.get("self", None), ConnectorHook)):
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+class RoundTripAccounting(ConnectorHook):
+    """
+    Counts bizhawk.read/write round trips, bytes and call sites per scope, and checks them against budgets.
+    It's a connector hook on the context given to `attach`, which the client does every game_watcher.
+    The client opens a "cycle" scope for every game_watcher, and a "room_transition" scope from taking an entrance
+    until the new room is fully loaded. Scopes can overlap, a round trip counts toward every open scope.
+    Scopes that got cut off, like a room transition interrupted by the menu, are cancelled instead of ended.
+    Going over a budget logs a warning, or raises RoundTripBudgetExceeded with strict=True, for tests.
+    While disabled it's on no hook chain and begin/end return right away.
+    """
+
+    def __init__(self, budgets: dict[str, int] | None = None, strict=False, history=200):
+        """
+        :param budgets: max round trips per scope name, like {"cycle": 3, "room_transition": 20}
+        :param strict: raise instead of warn when over budget
+        :param history: number of finished scopes kept per scope name
+        """
+        self.budgets = dict(budgets or {})
+        self.strict = strict
+        self.history_size = history
+        self.history: dict[str, deque[RoundTrips]] = {}
+        self.open_scopes: dict[str, RoundTrips] = {}
+        self.bizhawk_ctx = None
+        self._enabled = False
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool):
+        self._enabled = enabled
+        if not enabled:
+            self.detach()
+            self.open_scopes.clear()
+
+    def attach(self, bizhawk_ctx):
+        """
+        count the round trips of this bizhawk context, moving off the last one. Does nothing while disabled
+        """
+        if self._enabled and bizhawk_ctx is not self.bizhawk_ctx:
+            self.detach()
+            add_hook(bizhawk_ctx, self)
+            self.bizhawk_ctx = bizhawk_ctx
+
+    def detach(self):
+        if self.bizhawk_ctx is not None:
+            remove_hook(self.bizhawk_ctx, self)
+            self.bizhawk_ctx = None
+
+    async def read(self, call_next, bizhawk_ctx, read_list):
+        self._count(True, sum(size for _, size, _ in read_list))
+        return await call_next(bizhawk_ctx, read_list)
+
+    async def write(self, call_next, bizhawk_ctx, write_list):
+        self._count(False, sum(len(values) for _, values, _ in write_list))
+        return await call_next(bizhawk_ctx, write_list)
+
+    def _count(self, read: bool, size: int):
+        if not self.open_scopes:
+            return
+        site = _call_site()
+        for scope in self.open_scopes.values():
+            if read:
+                scope.reads += 1
+                scope.bytes_read += size
+            else:
+                scope.writes += 1
+                scope.bytes_written += size
+            scope.sites[site] += 1
+
+    def is_open(self, name: str) -> bool:
+        return name in self.open_scopes
+
+    def begin(self, name: str):
+        """
+        start counting a scope, restarting it if it's already open
+        """
+        if self._enabled:
+            self.open_scopes[name] = RoundTrips(name)
+
+    def cancel(self, name: str):
+        """
+        stop counting a scope without keeping or checking it, for when what it measured got cut off
+        """
+        self.open_scopes.pop(name, None)
+
+    def end(self, name: str) -> RoundTrips | None:
+        """
+        stop counting a scope and check it against its budget
+        :return: the scope's counts, None if it wasn't open
+        """
+        scope = self.open_scopes.pop(name, None)
+        if scope is None:
+            return None
+        history = self.history.get(name, None)
+        if history is None:
+            history = self.history[name] = deque(maxlen=self.history_size)
+        history.append(scope)
+
+        budget = self.budgets.get(name, None)
+        if budget is not None and scope.total > budget:
+            if self.strict:
+                raise RoundTripBudgetExceeded(f"Over budget of {budget}, {scope}")
+            memory_logger.warning("Over round trip budget of %d, %s", budget, scope)
+        else:
+            memory_logger.debug("%s", scope)
+        return scope
+
+    @contextmanager
+    def scope(self, name: str):
+        self.begin(name)
+        yield
+        self.end(name)
+
+    def last(self, name: str) -> RoundTrips | None:
+        history = self.history.get(name, None)
+        return history[-1] if history else None
+
+    def report(self) -> str:
+        """
+        :return: per scope name, the average and max round trips and the call sites that made the most
+        """
+        lines = []
+        for name, history in self.history.items():
+            if not history:
+                continue
+            totals = [s.total for s in history]
+            sites = Counter()
+            for s in history:
+                sites.update(s.sites)
+            lines.append(f"{name}: {len(history)} scopes, avg {sum(totals) / len(totals):.2f}, max {max(totals)}"
+                         + (f", budget {self.budgets[name]}" if name in self.budgets else ""))
+            lines += [f"\t{site} x{count}" for site, count in sites.most_common(10)]
+        return "\n".join(lines)
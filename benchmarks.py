@@ -0,0 +1,347 @@
+"""
+Scenario benchmarks for DSZeldaClient.game_watcher, run against FakeBizHawk instead of an emulator.
+Run from an Archipelago checkout, with the game client class to benchmark:
+    python -m worlds.tloz_ph.DSZeldaClient.benchmarks worlds.tloz_ph.Client:PhantomHourglassClient --latency 0.002
+"""
+import argparse
+import asyncio
+import importlib
+import time
+from enum import IntEnum
+from typing import Callable, Awaitable, NamedTuple
+
+from NetUtils import NetworkItem
+from .fake_bizhawk import FakeBizHawk, FakeBizHawkClientContext
+from .subclasses import DSTransition
+
+
+class ScenarioResult(NamedTuple):
+    name: str
+    cycles: int
+    seconds: float
+    cycles_per_second: float
+    round_trips: int
+    reads: int
+    writes: int
+    bytes_read: int
+    bytes_written: int
+    send_calls: int
+    latency_p50: float
+    latency_p95: float
+    latency_max: float
+
+    def __str__(self):
+        return (f"{self.name:<28}{self.cycles:>7}{self.cycles_per_second:>10.1f}{self.round_trips:>8}"
+                f"{self.round_trips / max(self.cycles, 1):>8.2f}{self.send_calls:>7}"
+                f"{self.latency_p50 * 1000:>9.2f}{self.latency_p95 * 1000:>9.2f}{self.latency_max * 1000:>9.2f}")
+
+
+RESULT_HEADER = (f"{'scenario':<28}{'cycles':>7}{'cyc/s':>10}{'trips':>8}{'trip/c':>8}{'sends':>7}"
+                 f"{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+
+
+class Harness:
+    """
+    A client, a FakeBizHawk and a FakeBizHawkClientContext wired together, with helpers to script the game.
+    Values are set by their name in the client's main_read_list, so scenarios work for any game using DSZeldaClient.
+    :param loading_name: main_read_list name of the loading variable, toggled during room transitions
+    :param loading_value: value that means loading
+    """
+
+    def __init__(self, client, fake: FakeBizHawk | None = None, ctx: FakeBizHawkClientContext | None = None,
+                 loading_name="loading", loading_value=1):
+        self.client = client
+        self.fake = fake or FakeBizHawk()
+        self.ctx = ctx or FakeBizHawkClientContext()
+        self.loading_name = loading_name
+        self.loading_value = loading_value
+        self.latencies: list[float] = []
+        self.start_time = time.perf_counter()
+        self.start_sends = 0
+
+    async def setup(self):
+        stage = self.client.starting_entrance[0]
+        await self.client.update_main_read_list(self.ctx, stage, in_game=False)
+        self.client._main_read_cache.invalidate()
+        self.client._loaded_menu_read_list = True
+
+    def set(self, name: str, value: int):
+        if name in self.client.main_read_list:
+            address, size, domain = self.client.main_read_list[name]
+            self.fake.poke(address, value, size, domain)
+
+    def get(self, name: str) -> int | None:
+        if name not in self.client.main_read_list:
+            return None
+        address, size, domain = self.client.main_read_list[name]
+        return self.fake.peek(address, size, domain)
+
+    def reset_measurement(self):
+        self.fake.reset_counters()
+        self.latencies.clear()
+        self.start_sends = self.ctx.send_calls
+        self.start_time = time.perf_counter()
+
+    async def cycle(self):
+        start = time.perf_counter()
+        await self.client.game_watcher(self.ctx)
+        self.latencies.append(time.perf_counter() - start)
+
+    async def cycles(self, count: int):
+        for _ in range(count):
+            await self.cycle()
+
+    async def enter_game(self, stage=None, room=None, entrance=None):
+        stage, room, entrance = (self.client.starting_entrance if stage is None else (stage, room, entrance or 0))
+        self.set("game_state", 0)
+        await self.cycles(2)
+        self.set("game_state", 1)
+        self.set("slot_id", self.ctx.slot)
+        await self.transition(stage, room, entrance)
+
+    async def transition(self, stage: int, room: int, entrance=0):
+        """
+        walk into a new room: scene change, loading, fully loaded
+        """
+        self.set("stage", stage)
+        self.set("room", room)
+        self.set("entrance", entrance)
+        await self.cycle()
+        self.set(self.loading_name, self.loading_value)
+        await self.cycle()
+        self.set(self.loading_name, 0 if self.loading_value else 1)
+        await self.cycles(2)
+
+    def scenes(self) -> list[int]:
+        """
+        scenes the game has locations in, a decent list of valid rooms to walk through
+        """
+        return sorted(self.client.location_area_to_watches.keys())
+
+    def result(self, name: str) -> ScenarioResult:
+        seconds = time.perf_counter() - self.start_time
+        latencies = sorted(self.latencies) or [0.0]
+        return ScenarioResult(
+            name, len(self.latencies), seconds, len(self.latencies) / seconds if seconds else 0.0,
+            self.fake.round_trips, self.fake.reads, self.fake.writes, self.fake.bytes_read, self.fake.bytes_written,
+            self.ctx.send_calls - self.start_sends, latencies[len(latencies) // 2],
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], latencies[-1])
+
+
+# Scenarios
+async def menu_to_game(h: Harness, repeat=10):
+    h.reset_measurement()
+    for _ in range(repeat):
+        h.client._previous_game_state = False
+        await h.enter_game()
+
+
+async def room_transitions(h: Harness, count=50, er=False):
+    if er:
+        h.ctx.slot_data["er_pairings"] = {
+            str(t.id): t.vanilla_reciprocal.id for t in h.client.entrances.values()
+            if t.id is not None and t.vanilla_reciprocal is not None}
+    await h.enter_game()
+    h.reset_measurement()
+    scenes = h.scenes() or [h.client.starting_entrance[0] << 8 | h.client.starting_entrance[1]]
+    for i in range(count):
+        scene = scenes[i % len(scenes)]
+        await h.transition(scene >> 8, scene & 0xFF)
+
+
+async def room_transitions_er(h: Harness, count=50):
+    await room_transitions(h, count, er=True)
+
+
+async def item_backlog(h: Harness, count=300, max_cycles=2000):
+    await h.enter_game()
+    item_ids = [item_id for item_id, name in h.client.item_id_to_name.items()
+                if "Small Key" not in name and h.client.can_bulk_receive(name, _items_data()[name])]
+    h.ctx.items_received = [NetworkItem(item_ids[i % len(item_ids)], -1, 0, 0) for i in range(count)]
+    h.reset_measurement()
+    while (h.get("received_item_index") or 0) < count and len(h.latencies) < max_cycles:
+        await h.cycle()
+
+
+async def location_pickups(h: Harness, scene_count=20):
+    await h.enter_game()
+    h.reset_measurement()
+    for scene in h.scenes()[:scene_count]:
+        await h.transition(scene >> 8, scene & 0xFF)
+        for _ in h.client.location_area_to_watches[scene]:
+            h.set("getting_location", 1)
+            await h.cycle()
+            h.set("getting_location", 0)
+            await h.cycles(2)
+
+
+async def dynamic_flag_scenes(h: Harness, scene_count=10, repeat=3):
+    await h.enter_game()
+    h.reset_measurement()
+    flag_scenes = sorted(h.client.scene_to_dynamic_flag, key=lambda s: -len(h.client.scene_to_dynamic_flag[s]))
+    flag_scenes = [s for s in flag_scenes if (s >> 8) in _stages()][:scene_count]
+    for _ in range(repeat):
+        for scene in flag_scenes:
+            await h.transition(scene >> 8, scene & 0xFF)
+
+
+SCENARIOS: dict[str, Callable[[Harness], Awaitable[None]]] = {
+    "menu_to_game": menu_to_game,
+    "room_transitions": room_transitions,
+    "room_transitions_er": room_transitions_er,
+    "item_backlog": item_backlog,
+    "location_pickups": location_pickups,
+    "dynamic_flag_scenes": dynamic_flag_scenes,
+}
+
+
+# The game's data, from wherever the client gets it
+def _items_data() -> dict:
+    from .DSZeldaClient import ITEMS_DATA
+    return ITEMS_DATA
+
+
+def _stages():
+    from .DSZeldaClient import STAGES
+    return STAGES
+
+
+async def run_scenario(client_factory: Callable, name: str, scenario: Callable[[Harness], Awaitable[None]],
+                       latency=0.0, **harness_args) -> ScenarioResult:
+    """
+    run one scenario on a fresh client and fake emulator
+    :param client_factory: makes the client to benchmark, usually the client class
+    :param name:
+    :param scenario:
+    :param latency: seconds added to every connector round trip
+    :param harness_args: passed to Harness
+    """
+    h = Harness(client_factory(), FakeBizHawk(latency=latency), **harness_args)
+    with h.fake.install():
+        await h.setup()
+        await scenario(h)
+    return h.result(name)
+
+
+async def run_benchmarks(client_factory: Callable, scenarios: list[str] | None = None, latency=0.0,
+                         **harness_args) -> list[ScenarioResult]:
+    results = []
+    for name in scenarios or SCENARIOS:
+        results.append(await run_scenario(client_factory, name, SCENARIOS[name], latency, **harness_args))
+    return results
+
+
+async def _receive_backlog(client_factory, item_ids: list[int], bulk: bool, max_cycles: int,
+                           **harness_args) -> FakeBizHawk:
+    h = Harness(client_factory(), FakeBizHawk(), **harness_args)
+    h.client.bulk_item_sync = bulk
+    with h.fake.install():
+        await h.setup()
+        await h.enter_game()
+        h.ctx.items_received = [NetworkItem(item_id, -1, 0, 0) for item_id in item_ids]
+        while (h.get("received_item_index") or 0) < len(item_ids) and len(h.latencies) < max_cycles:
+            await h.cycle()
+    return h.fake
+
+
+async def check_bulk_receive(client_factory: Callable, count=300, max_cycles=2000,
+                             **harness_args) -> list[tuple[str, int]]:
+    """
+    give the same item backlog in bulk and one item per cycle, on fresh clients and fake emulators, and compare memory
+    :param client_factory: makes the client to check, usually the client class
+    :param count: backlog size, cycling through every item the game has
+    :param max_cycles: cycles to give up after, per run
+    :param harness_args: passed to Harness
+    :return: (domain, address) of every byte that ended up different, empty if bulk receive matches
+    """
+    item_ids = sorted(client_factory().item_id_to_name)
+    item_ids = [item_ids[i % len(item_ids)] for i in range(count)]
+    bulk = await _receive_backlog(client_factory, item_ids, True, max_cycles, **harness_args)
+    single = await _receive_backlog(client_factory, item_ids, False, max_cycles, **harness_args)
+    return [(domain, address) for domain, memory in bulk.memory.items()
+            for address, (a, b) in enumerate(zip(memory, single.memory[domain])) if a != b]
+
+
+class _Direction(IntEnum):
+    NONE = 0
+    NORTH = 1
+    SOUTH = 2
+
+
+class _BenchTransition(DSTransition):
+    __slots__ = ()
+    entrance_groups = _Direction
+    opposite_entrance_groups = {_Direction.NORTH: _Direction.SOUTH, _Direction.SOUTH: _Direction.NORTH}
+
+
+def synthetic_entrances(count: int) -> dict[str, dict]:
+    """
+    entrance table shaped like the games' ones, every 4th entrance continuous with bounds
+    """
+    res = {}
+    for i in range(count):
+        stage, room = divmod(i, 0x40)
+        data = {"entrance_region": f"Region {i}", "exit_region": f"Region {i + 1}", "return_name": f"Return {i}",
+                "type": 1, "direction": _Direction.NORTH, "entrance": (stage, room, i % 8),
+                "exit": (stage, room + 1, 0xF0 if i % 4 == 0 else i % 8), "coords": (0, i * 0x1000, 0)}
+        if i % 4 == 0:
+            data["extra_data"] = {"x_min": -0x1000, "x_max": 0x1000}
+        res[f"Entrance {i}"] = data
+    return res
+
+
+def transition_table_scaling(sizes=(100, 1000, 10000, 100000), repeat=3) -> list[tuple[int, float]]:
+    """
+    time DSTransition.from_data on synthetic entrance tables of increasing size
+    :return: entrance count, best build time in seconds
+    """
+    res = []
+    for size in sizes:
+        data = synthetic_entrances(size)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _BenchTransition.from_data(data)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        res.append((size, best))
+    return res
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark a DSZeldaClient game client against a fake emulator")
+    parser.add_argument("client", nargs="?", help="client class, as module:Class")
+    parser.add_argument("--transitions", action="store_true", help="time transition table builds by size instead")
+    parser.add_argument("--check-bulk", action="store_true",
+                        help="check that bulk item receive writes the same memory as one item per cycle instead")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="scenarios to run, default all")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per connector round trip")
+    parser.add_argument("--loading-name", default="loading", help="main_read_list name of the loading variable")
+    parser.add_argument("--loading-value", type=int, default=1, help="value of the loading variable while loading")
+    args = parser.parse_args(args)
+
+    if args.transitions or not args.client:
+        print(f"{'entrances':>10}{'ms':>10}{'us/entrance':>13}")
+        for size, seconds in transition_table_scaling():
+            print(f"{size:>10}{seconds * 1000:>10.2f}{seconds * 1e6 / size:>13.2f}")
+        return
+
+    module_name, class_name = args.client.split(":")
+    client_class = getattr(importlib.import_module(module_name), class_name)
+    if args.check_bulk:
+        differences = asyncio.run(check_bulk_receive(client_class, loading_name=args.loading_name,
+                                                     loading_value=args.loading_value))
+        print(f"{len(differences)} bytes differ between bulk and single item receive")
+        for domain, address in differences[:50]:
+            print(f"\t{domain} {address:#x}")
+        return
+
+    results = asyncio.run(run_benchmarks(client_class, args.scenario, args.latency,
+                                         loading_name=args.loading_name, loading_value=args.loading_value))
+    print(RESULT_HEADER)
+    for result in results:
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
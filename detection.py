@@ -0,0 +1,238 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .memory import compile_read_list, READ_SPAN_GAP
+from .subclasses import DSTransition
+
+CONTINUOUS_ENTRANCE = 0xF0  # Entrance ids from here on are detected with coordinates
+VECTORIZE_MIN = 128  # Continuous transitions in a scene before one numpy comparison beats looping them
+
+
+class EntranceIndex:
+    """
+    Lookup for er_in_scene, keyed on (exit_scene, entrance) of the detect transition.
+    Discrete entrances resolve with one dict lookup, continuous entrances only check the bounds of transitions
+    with the same key, pre-extracted from extra_data.
+    Transitions that override detect_exit can't be indexed, and are checked with detect_exit in dict order.
+    With numpy installed and enough continuous transitions, those get packed into ContinuousArrays instead.
+    """
+
+    def __init__(self, er_in_scene: dict[DSTransition, DSTransition]):
+        self.er_in_scene = er_in_scene
+        self.discrete: dict[tuple[int, int], tuple[int, DSTransition, DSTransition]] = {}
+        self.continuous: dict[tuple[int, int], list[tuple[int, tuple, DSTransition, DSTransition]]] = {}
+        self.custom: list[tuple[int, DSTransition, DSTransition]] = []
+
+        for position, (detect_data, exit_data) in enumerate(er_in_scene.items()):
+            if (type(detect_data).detect_exit is not DSTransition.detect_exit or
+                    type(detect_data).detect_exit_scene is not DSTransition.detect_exit_scene):
+                self.custom.append((position, detect_data, exit_data))
+                continue
+            if detect_data.exit is None:
+                continue
+            key = (detect_data.exit_scene, detect_data.exit[2])
+            if key[1] < CONTINUOUS_ENTRANCE:
+                self.discrete.setdefault(key, (position, detect_data, exit_data))
+            else:
+                self.continuous.setdefault(key, []).append((position, get_bounds(detect_data), detect_data, exit_data))
+
+        rows = sorted(row for rows in self.continuous.values() for row in rows)
+        self.arrays = ContinuousArrays(rows) if np is not None and len(rows) >= VECTORIZE_MIN else None
+
+    def is_stale(self, er_in_scene) -> bool:
+        """
+        er_in_scene was replaced. In place edits still need DSZeldaClient.build_er_index
+        """
+        return er_in_scene is not self.er_in_scene
+
+    def needs_coords(self, scene, entrance) -> bool:
+        return bool(self.custom) or (scene, entrance) in self.continuous
+
+    def find(self, scene, entrance, coords=None, y_offset=0) -> tuple[DSTransition, DSTransition] | None:
+        """
+        find the first transition in er_in_scene that detects the exit, same as looping detect_exit
+        :param scene: scene being entered
+        :param entrance: entrance being entered from
+        :param coords: link's coords, only needed if needs_coords
+        :param y_offset:
+        :return: detect_data, exit_data
+        """
+        key = (scene, entrance)
+        best = self.discrete.get(key, None)
+        if best is None and key in self.continuous:
+            x, y, z = coords["x"], coords["y"] - y_offset, coords["z"]
+            if self.arrays is not None:
+                best = self.arrays.find(scene, entrance, x, y, z)
+            else:
+                best = _find_continuous(self.continuous[key], x, y, z)
+
+        for position, detect_data, exit_data in self.custom:
+            if best is not None and position > best[0]:
+                break
+            if detect_data.detect_exit(scene, entrance, coords, y_offset):
+                best = position, detect_data, exit_data
+                break
+
+        return best[1:] if best is not None else None
+
+
+def _find_continuous(candidates, x, y, z) -> tuple[int, DSTransition, DSTransition] | None:
+    for candidate in candidates:
+        x_min, x_max, z_min, z_max, entrance_y = candidate[1]
+        entrance_y = y if entrance_y is None else entrance_y
+        if entrance_y + 2000 > y >= entrance_y and x_max > x > x_min and z_max > z > z_min:
+            return candidate[0], candidate[2], candidate[3]
+    return None
+
+
+class ContinuousArrays:
+    """
+    Continuous transitions of a scene packed into numpy arrays, in dict order,
+    so matching Link's coords against all of them is one vectorized comparison.
+    """
+
+    def __init__(self, rows: list[tuple[int, tuple, DSTransition, DSTransition]]):
+        """
+        :param rows: position, bounds from get_bounds, detect transition, exit transition
+        """
+        self.rows = rows
+        self.exit_scene = np.array([r[2].exit_scene for r in rows], dtype=np.int64)
+        self.entrance = np.array([r[2].exit[2] for r in rows], dtype=np.int64)
+        bounds = np.array([[0 if b is None else b for b in r[1]] for r in rows], dtype=np.int64)
+        self.x_min, self.x_max, self.z_min, self.z_max, self.y = bounds.T
+        self.any_y = np.array([r[1][4] is None for r in rows], dtype=bool)
+
+    def find(self, scene, entrance, x, y, z) -> tuple[int, DSTransition, DSTransition] | None:
+        """
+        :return: position, detect transition and exit transition of the first match
+        """
+        match = ((self.exit_scene == scene) & (self.entrance == entrance) &
+                 (self.x_max > x) & (self.x_min < x) & (self.z_max > z) & (self.z_min < z) &
+                 (self.any_y | ((self.y + 2000 > y) & (self.y <= y))))
+        index = int(match.argmax())
+        if not match[index]:
+            return None
+        position, _, detect_data, exit_data = self.rows[index]
+        return position, detect_data, exit_data
+
+
+def get_bounds(transition: DSTransition) -> tuple[int, int, int, int, int | None]:
+    """
+    continuous detection bounds of a transition, same defaults as DSTransition.detect_exit
+    :return: x_min, x_max, z_min, z_max, y (None if any y)
+    """
+    return transition.x_min, transition.x_max, transition.z_min, transition.z_max, transition.y
+
+
+LOCATION_GRID_CELL = 0x20000  # Size of a grid cell in game coordinates
+LOCATION_GRID_MAX_CELLS = 32  # Locations spanning more cells than this on an axis are checked on every lookup
+
+
+class LocationGrid:
+    """
+    Uniform x/z grid over the coordinate bounds of the locations in a scene.
+    A lookup only checks the locations in Link's cell and the ones too large to put in cells,
+    and returns matches in the order of the scene's location dict, so list position semantics are kept.
+    Locations detected by an address are left out.
+    """
+
+    def __init__(self, locations: dict[str, dict], cell=LOCATION_GRID_CELL, max_cells=LOCATION_GRID_MAX_CELLS):
+        self.locations = locations
+        self.size = len(locations)
+        self.cell = cell
+        self.bounds: dict[str, tuple[int, int, int, int, int | None]] = {}
+        self.cells: dict[tuple[int, int], list[tuple[int, str]]] = {}
+        self.unbounded: list[tuple[int, str]] = []
+
+        for position, (loc_name, location) in enumerate(locations.items()):
+            if "address" in location:
+                continue
+            x_min, x_max = location.get("x_min", -0x8FFFFFFF), location.get("x_max", 0x8FFFFFFF)
+            z_min, z_max = location.get("z_min", -0x8FFFFFFF), location.get("z_max", 0x8FFFFFFF)
+            self.bounds[loc_name] = (x_min, x_max, z_min, z_max, location.get("y", None))
+
+            x_cells = range(x_min // cell, x_max // cell + 1)
+            z_cells = range(z_min // cell, z_max // cell + 1)
+            if len(x_cells) > max_cells or len(z_cells) > max_cells:
+                self.unbounded.append((position, loc_name))
+                continue
+            for cx in x_cells:
+                for cz in z_cells:
+                    self.cells.setdefault((cx, cz), []).append((position, loc_name))
+
+    def is_stale(self, locations) -> bool:
+        """
+        locations was replaced or grew. Other in place edits still need DSZeldaClient.build_location_grid
+        """
+        return locations is not self.locations or len(locations) > self.size
+
+    def find(self, coords: dict) -> list[str]:
+        """
+        :param coords: link's coords
+        :return: names of locations whose bounds contain the coords, in location dict order
+        """
+        x, y, z = coords["x"], coords["y"], coords["z"]
+        candidates = self.cells.get((x // self.cell, z // self.cell), [])
+        if self.unbounded:
+            candidates = sorted(candidates + self.unbounded)
+
+        res = []
+        for _, loc_name in candidates:
+            x_min, x_max, z_min, z_max, loc_y = self.bounds[loc_name]
+            if x_max > x > x_min and z_max > z > z_min and (loc_y is None or loc_y == y):
+                res.append(loc_name)
+        return res
+
+
+class WatchTable:
+    """
+    The client's location watches compiled by byte. Every watched address is read once with the OR of its locations'
+    bits as a mask, so one AND tells if anything at that address fired before looking at single locations.
+    Fired locations come back in watch order.
+    It's stale once the watches differ from a copy taken when it was built, or the client bumped their version.
+    """
+
+    def __init__(self, watches: dict[str, tuple[int, int, str]], locations_data: dict[str, dict], gap=READ_SPAN_GAP,
+                 version=0):
+        """
+        :param watches: location name to (address, size, domain), as in DSZeldaClient.watches
+        :param locations_data: location name to data with the "value" bits to test
+        :param gap: span merge gap for the read
+        :param version: version of watches this is built from, see is_stale
+        """
+        self.watches = watches
+        self.version = version
+        self.source = dict(watches)
+        self.masks: dict[tuple[str, int], int] = {}
+        self.bits: dict[tuple[str, int], list[tuple[int, int, str]]] = {}  # address -> (bits, position, location)
+        read_list = {}
+        for position, (loc_name, (address, size, domain)) in enumerate(watches.items()):
+            key = (domain, address)
+            value = locations_data[loc_name]["value"]
+            # Watches of different sizes on one address read the largest
+            read_list[key] = (address, max(size, read_list.get(key, (0, 0))[1]), domain)
+            self.masks[key] = self.masks.get(key, 0) | value
+            self.bits.setdefault(key, []).append((value, position, loc_name))
+        self.read_list = compile_read_list(read_list, gap)
+
+    def is_stale(self, watches, version: int) -> bool:
+        """
+        watches are a few dozen at most, comparing them costs nothing next to the read
+        """
+        return watches is not self.watches or version != self.version or watches != self.source
+
+    def fired(self, read_result: dict[tuple[str, int], int]) -> list[str]:
+        """
+        :param read_result: result of reading `read_list`
+        :return: names of locations whose bits are set, in watch order
+        """
+        res = []
+        masks = self.masks
+        for key, value in read_result.items():
+            if value & masks[key]:
+                res += [(position, loc_name) for bits, position, loc_name in self.bits[key] if value & bits]
+        if len(res) > 1:
+            res.sort()
+        return [loc_name for _, loc_name in res]
@@ -0,0 +1,170 @@
+import asyncio
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from NetUtils import ClientStatus
+import worlds._bizhawk as bizhawk
+from .io_hooks import use_connector
+
+# Memory domains of the melonDS core, with their sizes
+DS_DOMAINS = {
+    "Main RAM": 0x400000,
+    "Data TCM": 0x4000,
+    "SRAM": 0x80000,
+}
+
+
+class FakeBizHawk:
+    """
+    In-process stand-in for the worlds._bizhawk connector, backed by a bytearray per memory domain.
+    `install()` swaps it in for read/write/lock/unlock and friends on the worlds._bizhawk module, so every
+    `bizhawk.read(...)` in the client and game code talks to it instead of an emulator.
+    Counts round trips and bytes, and can add a fixed latency per round trip to model the real connector.
+    """
+
+    def __init__(self, domains: dict[str, int] | None = None, latency=0.0):
+        self.memory: dict[str, bytearray] = {name: bytearray(size) for name, size in (domains or DS_DOMAINS).items()}
+        self.latency = latency
+        self.locked = False
+        self.messages: list[str] = []
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.reads = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    @property
+    def round_trips(self) -> int:
+        return self.reads + self.writes
+
+    def _domain(self, address: int, size: int, domain: str) -> bytearray:
+        if domain not in self.memory or address < 0 or address + size > len(self.memory[domain]):
+            raise bizhawk.RequestFailedError(f"Invalid read/write {hex(address)} {size} {domain}")
+        return self.memory[domain]
+
+    # Direct memory access for scenarios, no round trips counted
+    def peek(self, address: int, size=1, domain="Main RAM", signed=False) -> int:
+        return int.from_bytes(self._domain(address, size, domain)[address:address + size], "little", signed=signed)
+
+    def poke(self, address: int, value: int, size=1, domain="Main RAM"):
+        self._domain(address, size, domain)[address:address + size] = \
+            (value & ((1 << (size * 8)) - 1)).to_bytes(size, "little")
+
+    async def _round_trip(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    # Connector API
+    async def read(self, ctx, read_list) -> list[bytes]:
+        await self._round_trip()
+        self.reads += 1
+        res = []
+        for address, size, domain in read_list:
+            res.append(bytes(self._domain(address, size, domain)[address:address + size]))
+            self.bytes_read += size
+        return res
+
+    async def write(self, ctx, write_list) -> None:
+        await self._round_trip()
+        self.writes += 1
+        for address, values, domain in write_list:
+            self._domain(address, len(values), domain)[address:address + len(values)] = bytes(values)
+            self.bytes_written += len(values)
+
+    async def guarded_read(self, ctx, read_list, guard_list):
+        for address, expected, domain in guard_list:
+            if bytes(self._domain(address, len(expected), domain)[address:address + len(expected)]) != bytes(expected):
+                await self._round_trip()
+                self.reads += 1
+                return None
+        return await self.read(ctx, read_list)
+
+    async def guarded_write(self, ctx, write_list, guard_list) -> bool:
+        for address, expected, domain in guard_list:
+            if bytes(self._domain(address, len(expected), domain)[address:address + len(expected)]) != bytes(expected):
+                await self._round_trip()
+                self.writes += 1
+                return False
+        await self.write(ctx, write_list)
+        return True
+
+    async def lock(self, ctx):
+        self.locked = True
+
+    async def unlock(self, ctx):
+        self.locked = False
+
+    async def display_message(self, ctx, message: str):
+        self.messages.append(message)
+
+    @contextmanager
+    def install(self):
+        """
+        patch worlds._bizhawk to use this fake for the duration of the with block.
+        Reads and writes go through io_hooks, so connector hooks still see them
+        """
+        names = ["guarded_read", "guarded_write", "lock", "unlock", "display_message"]
+        originals = {name: getattr(bizhawk, name, None) for name in names}
+        try:
+            for name in names:
+                setattr(bizhawk, name, getattr(self, name))
+            with use_connector(self.read, self.write):
+                yield self
+        finally:
+            for name, original in originals.items():
+                if original is None:
+                    delattr(bizhawk, name)
+                else:
+                    setattr(bizhawk, name, original)
+
+
+class FakeBizHawkClientContext:
+    """
+    The parts of BizHawkClientContext that DSZeldaClient uses, connected to a pretend server.
+    Sent messages are recorded in `sent_messages`, and location checks and scouts are applied like the server would.
+    """
+
+    def __init__(self, slot=1, team=0, slot_data: dict | None = None):
+        self.server = SimpleNamespace(socket=SimpleNamespace(open=True, closed=False))
+        self.bizhawk_ctx = SimpleNamespace()
+        self.slot = slot
+        self.team = team
+        self.slot_data = slot_data or {}
+        self.game = None
+        self.items_handling = None
+        self.want_slot_data = None
+        self.watcher_timeout = 0.5
+        self.finished_game = False
+        self.tags: set[str] = set()
+
+        self.items_received: list = []
+        self.checked_locations: set[int] = set()
+        self.locations_checked: set[int] = set()
+        self.locations_scouted: set[int] = set()
+        self.missing_locations: set[int] = set()
+        self.stored_data: dict = {}
+        self.sent_messages: list[dict] = []
+        self.send_calls = 0
+
+    async def send_msgs(self, msgs: list[dict]):
+        self.send_calls += 1
+        self.sent_messages += msgs
+        for msg in msgs:
+            if msg["cmd"] == "LocationChecks":
+                self.checked_locations.update(msg["locations"])
+                self.locations_checked.update(msg["locations"])
+            elif msg["cmd"] == "LocationScouts":
+                self.locations_scouted.update(msg["locations"])
+            elif msg["cmd"] == "StatusUpdate" and msg["status"] == ClientStatus.CLIENT_GOAL:
+                self.finished_game = True
+
+    async def update_death_link(self, death_link: bool):
+        if death_link:
+            self.tags.add("DeathLink")
+        else:
+            self.tags.discard("DeathLink")
+
+    def disconnect(self):
+        self.server = None
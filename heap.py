@@ -0,0 +1,92 @@
+import asyncio
+import time
+import weakref
+
+import worlds._bizhawk as bizhawk
+from .tracing import memory_logger
+
+HEAP_START = 0x02000000  # Main RAM starts here in the DS address space
+
+
+class HeapPointerResolver:
+    """
+    Resolves heap addresses from pointers in Data TCM, and caches them until `invalidate` gets called.
+    The client invalidates on every load start and stage change, when the game can move its heap structures.
+    A pointer that's still 0 is polled with backoff until a deadline, and concurrent requests for the same pointer
+    share one resolution.
+    """
+
+    def __init__(self, poll_interval=0.01, max_poll_interval=0.2, deadline=5.0, clock=time.monotonic):
+        """
+        :param poll_interval: first wait after reading a 0 pointer, doubled after each try
+        :param max_poll_interval: longest wait between tries
+        :param deadline: seconds before giving up with a RequestFailedError
+        :param clock:
+        """
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.deadline = deadline
+        self.clock = clock
+        self.addresses: dict[int, int] = {}  # pointer -> Main RAM address it resolves to, before offset
+        self._pending: dict[int, asyncio.Future] = {}
+        self._generation = 0
+
+    def invalidate(self):
+        self.addresses.clear()
+        self._pending.clear()
+        self._generation += 1
+
+    async def resolve(self, ctx, pointer: int, offset=0) -> int:
+        """
+        :param ctx:
+        :param pointer: Data TCM address of the pointer
+        :param offset: added to the resolved address
+        :return: Main RAM address
+        """
+        address = self.addresses.get(pointer, None)
+        if address is None:
+            pending = self._pending.get(pointer, None)
+            if pending is None:
+                pending = self._pending[pointer] = asyncio.ensure_future(self._resolve(ctx, pointer))
+            # Shielded, so a cancelled caller doesn't cancel the resolution for everyone else waiting on it
+            address = await asyncio.shield(pending)
+        return address + offset
+
+    async def _resolve(self, ctx, pointer: int) -> int:
+        generation = self._generation
+        give_up = self.clock() + self.deadline
+        interval = self.poll_interval
+        try:
+            while True:
+                m_course = int.from_bytes((await bizhawk.read(ctx.bizhawk_ctx, [(pointer, 4, "Data TCM")]))[0],
+                                          "little")
+                if m_course:
+                    break
+                if self.clock() > give_up:
+                    raise bizhawk.RequestFailedError(f"Heap pointer {pointer:#x} still unset after {self.deadline}s")
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, self.max_poll_interval)
+
+            read = int.from_bytes((await bizhawk.read(ctx.bizhawk_ctx, [(m_course - HEAP_START, 4, "Main RAM")]))[0],
+                                  "little")
+            address = read - HEAP_START
+            memory_logger.debug("Got map address @ %#x", address)
+            if generation == self._generation:
+                self.addresses[pointer] = address
+            return address
+        finally:
+            if generation == self._generation:
+                self._pending.pop(pointer, None)
+
+
+_heap_resolvers: "weakref.WeakKeyDictionary[object, HeapPointerResolver]" = weakref.WeakKeyDictionary()
+
+
+def heap_resolver(ctx) -> HeapPointerResolver:
+    """
+    get the heap pointer resolver for a client context
+    """
+    resolver = _heap_resolvers.get(ctx, None)
+    if resolver is None:
+        resolver = _heap_resolvers[ctx] = HeapPointerResolver()
+    return resolver
@@ -0,0 +1,89 @@
+from contextlib import contextmanager
+
+import worlds._bizhawk as bizhawk
+
+
+class ConnectorHook:
+    """
+    Watches or changes the connector reads and writes of one bizhawk context, added with add_hook.
+    Override read and/or write, and await `call_next` to pass the request on down the chain.
+    """
+
+    async def read(self, call_next, bizhawk_ctx, read_list):
+        return await call_next(bizhawk_ctx, read_list)
+
+    async def write(self, call_next, bizhawk_ctx, write_list):
+        return await call_next(bizhawk_ctx, write_list)
+
+
+# What the end of every hook chain calls, the real connector unless use_connector swapped it
+_connector: dict[str, object] = {}
+# id(bizhawk_ctx) -> (bizhawk_ctx, hooks in call order). Kept as tuples, so a hook removed mid request can't break it
+_hooks: dict[int, tuple[object, tuple[ConnectorHook, ...]]] = {}
+
+
+async def _dispatch(name: str, bizhawk_ctx, request, hooks: tuple[ConnectorHook, ...], index: int):
+    if index == len(hooks):
+        return await _connector[name](bizhawk_ctx, request)
+    return await getattr(hooks[index], name)(lambda c, r: _dispatch(name, c, r, hooks, index + 1), bizhawk_ctx,
+                                             request)
+
+
+async def hooked_read(bizhawk_ctx, read_list):
+    entry = _hooks.get(id(bizhawk_ctx), None)
+    if entry is None:
+        return await _connector["read"](bizhawk_ctx, read_list)
+    return await _dispatch("read", bizhawk_ctx, read_list, entry[1], 0)
+
+
+async def hooked_write(bizhawk_ctx, write_list):
+    entry = _hooks.get(id(bizhawk_ctx), None)
+    if entry is None:
+        return await _connector["write"](bizhawk_ctx, write_list)
+    return await _dispatch("write", bizhawk_ctx, write_list, entry[1], 0)
+
+
+def _install():
+    # bizhawk.read/write get replaced once, by pass through functions that stay. Hooks come and go in _hooks
+    if bizhawk.read is not hooked_read or bizhawk.write is not hooked_write:
+        _connector["read"], _connector["write"] = bizhawk.read, bizhawk.write
+        bizhawk.read, bizhawk.write = hooked_read, hooked_write
+
+
+def add_hook(bizhawk_ctx, hook: ConnectorHook):
+    """
+    run every read and write on bizhawk_ctx through the hook, after the hooks added before it
+    """
+    _install()
+    _, hooks = _hooks.get(id(bizhawk_ctx), (bizhawk_ctx, ()))
+    if hook not in hooks:
+        _hooks[id(bizhawk_ctx)] = bizhawk_ctx, hooks + (hook,)
+
+
+def remove_hook(bizhawk_ctx, hook: ConnectorHook):
+    """
+    take a hook out of bizhawk_ctx's chain, wherever it is. Doesn't matter what was added or removed since
+    """
+    entry = _hooks.get(id(bizhawk_ctx), None)
+    if entry is None or entry[0] is not bizhawk_ctx:
+        return
+    hooks = tuple(h for h in entry[1] if h is not hook)
+    if hooks:
+        _hooks[id(bizhawk_ctx)] = bizhawk_ctx, hooks
+    else:
+        del _hooks[id(bizhawk_ctx)]
+
+
+@contextmanager
+def use_connector(read, write):
+    """
+    send reads and writes that made it through the hooks to other functions for the duration of the with block,
+    like FakeBizHawk or a strict trace replay
+    """
+    _install()
+    previous = dict(_connector)
+    _connector["read"], _connector["write"] = read, write
+    try:
+        yield
+    finally:
+        _connector.update(previous)
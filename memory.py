@@ -0,0 +1,193 @@
+from typing import Callable
+
+import worlds._bizhawk as bizhawk
+
+READ_SPAN_GAP = 8  # Max unused bytes between two reads before they get split into separate spans
+READ_SPAN_MAX = 0x100  # Max size of a merged span
+
+
+class MemoryTransaction:
+    """
+    Queues read-modify-write operations on emulator memory and commits them together.
+    Every address an operation needs the previous value of is read in one bizhawk.read, the new values are computed
+    locally in the order the operations were queued, and everything is written back in one bizhawk.write.
+    Operations work on little endian values of `size` bytes, and can overlap, so a 2 byte increment and a 1 byte
+    bit set on the same address see each other's results.
+    """
+
+    def __init__(self):
+        self._ops: list[tuple[int, int, str, Callable[[int], int] | None, int]] = []
+        self._bytes: dict[tuple[str, int], int] = {}
+        self._committed = False
+
+    def __len__(self):
+        return len(self._ops)
+
+    def _queue(self, address: int, size: int, domain: str, operation: Callable[[int], int] | None, value=0):
+        if self._committed:
+            raise RuntimeError("Can't queue operations on a committed MemoryTransaction")
+        self._ops.append((address, size, domain, operation, value))
+
+    def set_bits(self, address: int, value: int, size=1, domain="Main RAM"):
+        self._queue(address, size, domain, lambda prev: prev | value)
+
+    def unset_bits(self, address: int, value: int, size=1, domain="Main RAM"):
+        self._queue(address, size, domain, lambda prev: prev & (~value))
+
+    def increment(self, address: int, value: int, size=1, domain="Main RAM", minimum=0, maximum=None):
+        def incr(prev):
+            new_value = max(prev + value, minimum) if minimum is not None else prev + value
+            return min(new_value, maximum) if maximum is not None else new_value
+        self._queue(address, size, domain, incr)
+
+    def overwrite(self, address: int, value: int | list[int], size=1, domain="Main RAM"):
+        """
+        overwrite doesn't need to know the previous value, so it never adds to the read.
+        :param value: int of `size` bytes, or a list of bytes like bizhawk.write takes
+        """
+        if isinstance(value, (list, tuple, bytes)):
+            size = len(value)
+            value = int.from_bytes(bytes(v & 0xFF for v in value), "little")
+        self._queue(address, size, domain, None, value)
+
+    def update(self, address: int, operation: Callable[[int], int], size=1, domain="Main RAM"):
+        """
+        queue a custom operation, that gets called with the previous value and returns the new one
+        """
+        self._queue(address, size, domain, operation)
+
+    def extend(self, write_list: list[tuple[int, list[int], str]]):
+        """
+        add a bizhawk style write list as overwrites, for merging in write lists returned by game hooks
+        """
+        for address, values, domain in write_list:
+            self.overwrite(address, list(values), domain=domain)
+
+    def _read_list(self) -> list[tuple[int, int, str]]:
+        # Only bytes that are used before being overwritten need reading
+        known = set()
+        to_read = set()
+        for address, size, domain, operation, _ in self._ops:
+            span = [(domain, address + i) for i in range(size)]
+            if operation is not None:
+                to_read.update(b for b in span if b not in known)
+            known.update(span)
+        return _merge_bytes(to_read)
+
+    def _get(self, address: int, size: int, domain: str) -> int:
+        return int.from_bytes(bytes(self._bytes[(domain, address + i)] for i in range(size)), "little")
+
+    def _set(self, address: int, size: int, domain: str, value: int):
+        for i, b in enumerate((value & ((1 << (size * 8)) - 1)).to_bytes(size, "little")):
+            self._bytes[(domain, address + i)] = b
+
+    def result(self, address: int, size=1, domain="Main RAM") -> int:
+        """
+        value of an address after commit
+        """
+        return self._get(address, size, domain)
+
+    async def commit(self, ctx) -> list[tuple[int, list[int], str]]:
+        """
+        read, compute and write all queued operations. Makes no connector calls if nothing was queued
+        :param ctx:
+        :return: write list that was sent
+        """
+        self._committed = True
+        if not self._ops:
+            return []
+
+        read_list = self._read_list()
+        if read_list:
+            read_result = await bizhawk.read(ctx.bizhawk_ctx, read_list)
+            for (address, size, domain), data in zip(read_list, read_result):
+                for i, b in enumerate(data):
+                    self._bytes[(domain, address + i)] = b
+
+        written = set()
+        for address, size, domain, operation, value in self._ops:
+            if operation is not None:
+                value = operation(self._get(address, size, domain))
+            self._set(address, size, domain, value)
+            written.update((domain, address + i) for i in range(size))
+
+        write_list = [(address, [self._bytes[(domain, address + i)] for i in range(size)], domain)
+                      for address, size, domain in _merge_bytes(written)]
+        await bizhawk.write(ctx.bizhawk_ctx, write_list)
+        return write_list
+
+
+# Turn a set of (domain, address) bytes into the fewest contiguous (address, size, domain) ranges
+def _merge_bytes(byte_set) -> list[tuple[int, int, str]]:
+    ranges = []
+    for domain, address in sorted(byte_set):
+        if ranges and ranges[-1][2] == domain and ranges[-1][0] + ranges[-1][1] == address:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([address, 1, domain])
+    return [(a, s, d) for a, s, d in ranges]
+
+
+class CompiledReadList:
+    """
+    A named read list merged into the fewest contiguous span reads per domain.
+    read_memory_values sends the spans, and decode maps the names back to slices of the returned buffers.
+    """
+
+    def __init__(self, read_list: dict[str, tuple[int, int, str]], gap=READ_SPAN_GAP, max_span=READ_SPAN_MAX):
+        self.source = dict(read_list)
+        self.gap = gap
+        self.spans: list[tuple[int, int, str]] = []
+        self.slices: list[tuple[str, int, int, int]] = []  # name, span index, start, end
+
+        spans = []  # [address, size, domain, names]
+        for name, (address, size, domain) in sorted(self.source.items(), key=lambda i: (i[1][2], i[1][0])):
+            if spans:
+                span = spans[-1]
+                end = max(span[0] + span[1], address + size)
+                if span[2] == domain and address <= span[0] + span[1] + gap and end - span[0] <= max_span:
+                    span[1] = end - span[0]
+                    span[3].append(name)
+                    continue
+            spans.append([address, size, domain, [name]])
+
+        positions = {}
+        for i, (address, size, domain, names) in enumerate(spans):
+            self.spans.append((address, size, domain))
+            for name in names:
+                start = self.source[name][0] - address
+                positions[name] = (name, i, start, start + self.source[name][1])
+        self.slices = [positions[name] for name in self.source]
+
+    def __len__(self):
+        return len(self.slices)
+
+    def decode(self, read_result: list[bytes], signed=False) -> dict[str, int]:
+        return {name: int.from_bytes(read_result[i][start:end], "little", signed=signed)
+                for name, i, start, end in self.slices}
+
+
+def compile_read_list(read_list: dict[str, tuple[int, int, str]], gap=READ_SPAN_GAP) -> CompiledReadList:
+    return CompiledReadList(read_list, gap)
+
+
+class ReadListCache:
+    """
+    Holds the compiled version of a read list that gets read every cycle, like main_read_list.
+    Recompiles when a different dict is passed in, when the dict was edited in place, or after `invalidate`.
+    Comparing a few dozen tuples is far cheaper than the read itself, so subclasses can keep editing plain dicts.
+    """
+
+    def __init__(self):
+        self.compiled: CompiledReadList | None = None
+        self._read_list = None
+
+    def invalidate(self):
+        self.compiled = None
+
+    def get(self, read_list: dict[str, tuple[int, int, str]], gap=READ_SPAN_GAP) -> CompiledReadList:
+        if (self.compiled is None or read_list is not self._read_list or self.compiled.gap != gap or
+                read_list != self.compiled.source):
+            self.compiled = compile_read_list(read_list, gap)
+            self._read_list = read_list
+        return self.compiled
@@ -0,0 +1,89 @@
+import weakref
+
+from .tracing import trace_logger
+
+
+class Outbox:
+    """
+    Server messages queued during a game_watcher cycle, sent as one send_msgs when the cycle ends.
+    Compatible messages merge on the way in, at the position of the first one:
+    LocationChecks into one union of ids, LocationScouts into one per create_as_hint,
+    and Sets on the same key into one Set with all their operations, in order.
+    """
+
+    def __init__(self):
+        self.messages: list[dict] = []
+        self._merge_targets: dict[tuple, dict] = {}
+
+    def __len__(self):
+        return len(self.messages)
+
+    @staticmethod
+    def _merge_key(msg: dict) -> tuple | None:
+        cmd = msg.get("cmd", None)
+        if cmd == "LocationChecks":
+            return (cmd,)
+        if cmd == "LocationScouts":
+            return cmd, msg.get("create_as_hint", 0)
+        if cmd == "Set":
+            return cmd, msg["key"]
+        return None
+
+    def add(self, msg: dict):
+        key = self._merge_key(msg)
+        target = self._merge_targets.get(key, None) if key is not None else None
+        if target is None:
+            msg = dict(msg)
+            if key is not None:
+                if "locations" in msg:
+                    msg["locations"] = list(dict.fromkeys(msg["locations"]))
+                if "operations" in msg:
+                    msg["operations"] = list(msg["operations"])
+                self._merge_targets[key] = msg
+            self.messages.append(msg)
+        elif key[0] == "Set":
+            target["operations"] += msg["operations"]
+            target["want_reply"] = target.get("want_reply", False) or msg.get("want_reply", False)
+        else:
+            target["locations"] = list(dict.fromkeys(target["locations"] + list(msg["locations"])))
+
+    def extend(self, msgs: list[dict]):
+        for msg in msgs:
+            self.add(msg)
+
+    async def flush(self, ctx):
+        """
+        send everything queued. messages stay queued until send_msgs returns, so a failed send goes out next flush
+        """
+        if not self.messages:
+            return
+        msgs = list(self.messages)
+        # Messages queued from here on don't merge into ones on their way out
+        self._merge_targets.clear()
+        trace_logger.debug("Sending %d queued messages", len(msgs))
+        await ctx.send_msgs(msgs)
+        del self.messages[:len(msgs)]
+
+
+_outboxes: "weakref.WeakKeyDictionary[object, Outbox]" = weakref.WeakKeyDictionary()
+
+
+def outbox(ctx) -> Outbox:
+    """
+    get the message outbox for a client context
+    """
+    box = _outboxes.get(ctx, None)
+    if box is None:
+        box = _outboxes[ctx] = Outbox()
+    return box
+
+
+async def queue_msgs(ctx, msgs: list[dict], immediate=False):
+    """
+    queue messages to go out at the end of the game_watcher cycle
+    :param immediate: send now instead, skipping the queue
+    """
+    if immediate:
+        await ctx.send_msgs(msgs)
+    else:
+        outbox(ctx).extend(msgs)
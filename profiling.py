@@ -0,0 +1,76 @@
+import time
+from collections import deque
+from contextlib import nullcontext
+
+_NO_TIMING = nullcontext()
+
+
+class _Phase:
+    __slots__ = ("samples", "start")
+
+    def __init__(self, samples: deque):
+        self.samples = samples
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+
+class PhaseTimer:
+    """
+    Rolling timings of the phases of a game_watcher cycle.
+    Wrap a phase in `with timer.phase("name"):`. While disabled that's a shared no-op context manager,
+    so it can stay in the hot path.
+    """
+
+    def __init__(self, enabled=False, window=1000):
+        """
+        :param enabled:
+        :param window: number of samples kept per phase
+        """
+        self.enabled = enabled
+        self.window = window
+        self.samples: dict[str, deque[float]] = {}
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NO_TIMING
+        samples = self.samples.get(name, None)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        return _Phase(samples)
+
+    def reset(self):
+        self.samples.clear()
+
+    def stats(self, name: str) -> dict[str, float] | None:
+        """
+        :param name: phase name
+        :return: count, p50, p95, p99 and max in seconds, None if the phase has no samples
+        """
+        samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return None
+
+        def percentile(p):
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {"count": len(samples), "p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99),
+                "max": samples[-1]}
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {name: self.stats(name) for name in self.samples if self.samples[name]}
+
+    def report(self) -> str:
+        """
+        :return: table of the summary in milliseconds
+        """
+        lines = [f"{'phase':<20}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<20}{stats['count']:>7}" +
+                         "".join(f"{stats[k] * 1000:>9.2f}" for k in ["p50", "p95", "p99", "max"]))
+        return "\n".join(lines)
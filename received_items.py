@@ -0,0 +1,58 @@
+import weakref
+from bisect import bisect_left
+
+
+class ReceivedItemIndex:
+    """
+    Counts of received items by item id, kept up to date with ctx.items_received.
+    Only items that arrived since the last sync get processed, so lookups never rescan the whole list.
+    """
+
+    def __init__(self):
+        self._positions: dict[int, list[int]] = {}  # item id -> sorted indexes in items_received
+        self._items_received = None
+        self._synced = 0
+
+    def __len__(self):
+        return self._synced
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._positions
+
+    def sync(self, items_received: list) -> "ReceivedItemIndex":
+        # items_received gets replaced or cleared on reconnect, start over in that case
+        if items_received is not self._items_received or len(items_received) < self._synced:
+            self._positions = {}
+            self._items_received = items_received
+            self._synced = 0
+
+        for i in range(self._synced, len(items_received)):
+            self._positions.setdefault(items_received[i].item, []).append(i)
+        self._synced = len(items_received)
+        return self
+
+    def count(self, item_id: int, before: int | None = None) -> int:
+        """
+        :param item_id:
+        :param before: only count items among the first `before` received items
+        :return: number of times item_id was received
+        """
+        positions = self._positions.get(item_id, None)
+        if not positions:
+            return 0
+        if before is None or before >= self._synced:
+            return len(positions)
+        return bisect_left(positions, before)
+
+
+_received_item_indexes: "weakref.WeakKeyDictionary[object, ReceivedItemIndex]" = weakref.WeakKeyDictionary()
+
+
+def received_item_index(ctx) -> ReceivedItemIndex:
+    """
+    get the received item index for a client context, synced with ctx.items_received
+    """
+    index = _received_item_indexes.get(ctx, None)
+    if index is None:
+        index = _received_item_indexes[ctx] = ReceivedItemIndex()
+    return index.sync(ctx.items_received)
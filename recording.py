@@ -0,0 +1,375 @@
+"""
+Record a client session's connector traffic to a trace file, and replay it into game_watcher offline.
+Record from the client with `client.start_trace_recording("session.dsztrace.gz")`, then replay it against any
+version of the client:
+    python -m worlds.tloz_ph.DSZeldaClient.recording session.dsztrace.gz worlds.tloz_ph.Client:PhantomHourglassClient
+"""
+import argparse
+import asyncio
+import gzip
+import importlib
+import json
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import NamedTuple, Iterator
+
+from NetUtils import NetworkItem
+import worlds._bizhawk as bizhawk
+from .benchmarks import Harness, ScenarioResult, RESULT_HEADER
+from .fake_bizhawk import FakeBizHawk, FakeBizHawkClientContext
+from .io_hooks import ConnectorHook, add_hook, remove_hook, use_connector
+from .tracing import trace_logger
+
+TRACE_MAGIC = b"DSZTRACE"
+TRACE_VERSION = 1
+
+# Event kinds
+EVENT_CYCLE = 1  # game_watcher started
+EVENT_CONTEXT = 2  # changes to the client context since the last cycle, json
+EVENT_DOMAIN = 3  # name of the next memory domain index
+EVENT_READ = 4
+EVENT_WRITE = 5
+EVENT_SEND = 6  # ctx.send_msgs, json
+EVENT_ERROR = 7  # read or write raised, exception class name
+
+_EVENT_HEADER = struct.Struct("<BdI")  # kind, seconds since the trace started, payload length
+_COUNT = struct.Struct("<H")
+_ENTRY = struct.Struct("<IHB")  # address, size, domain index
+
+
+class TraceEvent(NamedTuple):
+    kind: int
+    time: float
+    data: object
+
+
+class TraceCycle(NamedTuple):
+    time: float
+    context: dict
+    events: list[TraceEvent]
+
+
+class TraceDivergence(Exception):
+    """
+    Raised by a strict replay when the client asks for something else than the recorded client did
+    """
+
+
+def _open(path, mode):
+    return gzip.open(path, mode) if str(path).endswith(".gz") else open(path, mode)
+
+
+def _json_default(o):
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    raise TypeError(f"Can't record {type(o).__name__}")
+
+
+class TraceRecorder(ConnectorHook):
+    """
+    Hooks the connector reads and writes of one client context, wraps its send_msgs, and records every request and
+    response to a trace file.
+    The client calls `start_cycle` at the top of every game_watcher, which also records what changed on the
+    server side of the context (items, checked locations, slot data, connection), so a replay has all the inputs.
+    Events are buffered in memory, and `end_cycle` hands them to a background thread that writes and compresses them,
+    so the event loop never waits on the file. Paths ending in .gz get compressed.
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.file = _open(path, "wb")
+        self.start = clock()
+        self.domains: dict[str, int] = {}
+        self.cycles = 0
+        self.ctx = None
+        self._buffer: list[bytes] = [TRACE_MAGIC + bytes([TRACE_VERSION])]
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TraceRecorder")
+        self._last_context = {}
+        self._items_received = None
+        self._item_count = 0
+        self._checked = set()
+        self._scouted = set()
+
+    def _event(self, kind: int, payload=b""):
+        self._buffer.append(_EVENT_HEADER.pack(kind, self.clock() - self.start, len(payload)) + payload)
+
+    def _domain(self, domain: str) -> int:
+        index = self.domains.get(domain, None)
+        if index is None:
+            index = self.domains[domain] = len(self.domains)
+            self._event(EVENT_DOMAIN, domain.encode())
+        return index
+
+    async def read(self, call_next, bizhawk_ctx, read_list):
+        try:
+            res = await call_next(bizhawk_ctx, read_list)
+        except Exception as e:
+            self._event(EVENT_ERROR, type(e).__name__.encode())
+            raise
+        payload = [_COUNT.pack(len(read_list))]
+        payload += [_ENTRY.pack(a, s, self._domain(d)) for a, s, d in read_list]
+        payload += [bytes(r) for r in res]
+        self._event(EVENT_READ, b"".join(payload))
+        return res
+
+    async def write(self, call_next, bizhawk_ctx, write_list):
+        try:
+            res = await call_next(bizhawk_ctx, write_list)
+        except Exception as e:
+            self._event(EVENT_ERROR, type(e).__name__.encode())
+            raise
+        payload = [_COUNT.pack(len(write_list))]
+        payload += [_ENTRY.pack(a, len(v), self._domain(d)) for a, v, d in write_list]
+        payload += [bytes(v) for _, v, _ in write_list]
+        self._event(EVENT_WRITE, b"".join(payload))
+        return res
+
+    def _install(self, ctx):
+        if self.ctx is not ctx:
+            self._uninstall_ctx()
+            self.ctx = ctx
+            add_hook(ctx.bizhawk_ctx, self)
+            send_msgs = ctx.send_msgs
+
+            async def recorded_send_msgs(msgs):
+                self._event(EVENT_SEND, json.dumps(msgs, default=_json_default, separators=(",", ":")).encode())
+                return await send_msgs(msgs)
+
+            ctx.send_msgs = recorded_send_msgs
+
+    def _uninstall_ctx(self):
+        if self.ctx is not None:
+            remove_hook(self.ctx.bizhawk_ctx, self)
+            if "send_msgs" in vars(self.ctx):
+                del self.ctx.send_msgs
+        self.ctx = None
+
+    def _context_changes(self, ctx) -> dict:
+        server = ctx.server
+        state = {
+            "connected": bool(server and server.socket.open and not server.socket.closed),
+            "slot": ctx.slot,
+            "team": ctx.team,
+            "finished_game": ctx.finished_game,
+        }
+        changes = {k: v for k, v in state.items() if self._last_context.get(k, None) != v}
+        if ctx.slot_data is not self._last_context.get("slot_data", None):
+            changes["slot_data"] = ctx.slot_data
+        state["slot_data"] = ctx.slot_data
+        self._last_context = state
+
+        if ctx.items_received is not self._items_received or len(ctx.items_received) < self._item_count:
+            self._items_received = ctx.items_received
+            self._item_count = 0
+            changes["reset_items"] = True
+        if len(ctx.items_received) > self._item_count:
+            changes["items"] = [list(i) for i in ctx.items_received[self._item_count:]]
+            self._item_count = len(ctx.items_received)
+        for name, seen, current in [("checked", self._checked, ctx.checked_locations),
+                                    ("scouted", self._scouted, ctx.locations_scouted)]:
+            if len(current) != len(seen):
+                changes[name] = sorted(set(current) - seen)
+                seen.update(current)
+        return changes
+
+    def start_cycle(self, ctx):
+        self._install(ctx)
+        self.cycles += 1
+        self._event(EVENT_CYCLE)
+        changes = self._context_changes(ctx)
+        if changes:
+            self._event(EVENT_CONTEXT, json.dumps(changes, default=_json_default, separators=(",", ":")).encode())
+
+    def end_cycle(self):
+        """
+        hand the events buffered since the last call to the writer thread
+        """
+        if self._buffer:
+            data = b"".join(self._buffer)
+            self._buffer = []
+            self._writer.submit(self.file.write, data).add_done_callback(self._written)
+
+    def _written(self, future):
+        if future.exception() is not None:
+            trace_logger.warning("Couldn't write to trace %s: %s", self.path, future.exception())
+
+    def close(self):
+        self._uninstall_ctx()
+        self.end_cycle()
+        self._writer.shutdown(wait=True)
+        self.file.close()
+
+
+def read_trace(path) -> Iterator[TraceEvent]:
+    """
+    decode a trace file. reads are (address, size, domain, bytes), writes (address, bytes, domain)
+    """
+    with _open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(TRACE_MAGIC) or data[len(TRACE_MAGIC)] != TRACE_VERSION:
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} DSZeldaClient trace")
+    domains = []
+    pos = len(TRACE_MAGIC) + 1
+    while pos < len(data):
+        kind, t, length = _EVENT_HEADER.unpack_from(data, pos)
+        pos += _EVENT_HEADER.size
+        payload = data[pos:pos + length]
+        pos += length
+        if kind == EVENT_DOMAIN:
+            domains.append(payload.decode())
+            continue
+        if kind in [EVENT_READ, EVENT_WRITE]:
+            count, = _COUNT.unpack_from(payload)
+            entries = [_ENTRY.unpack_from(payload, _COUNT.size + i * _ENTRY.size) for i in range(count)]
+            offset = _COUNT.size + count * _ENTRY.size
+            decoded = []
+            for address, size, domain in entries:
+                value = payload[offset:offset + size]
+                offset += size
+                if kind == EVENT_READ:
+                    decoded.append((address, size, domains[domain], value))
+                else:
+                    decoded.append((address, value, domains[domain]))
+            payload = decoded
+        elif kind in [EVENT_CONTEXT, EVENT_SEND]:
+            payload = json.loads(payload)
+        elif kind == EVENT_ERROR:
+            payload = payload.decode()
+        else:
+            payload = None
+        yield TraceEvent(kind, t, payload)
+
+
+def load_cycles(path) -> list[TraceCycle]:
+    cycles = []
+    for event in read_trace(path):
+        if event.kind == EVENT_CYCLE:
+            cycles.append(TraceCycle(event.time, {}, []))
+        elif not cycles:
+            continue
+        elif event.kind == EVENT_CONTEXT:
+            cycles[-1].context.update(event.data)
+        else:
+            cycles[-1].events.append(event)
+    return cycles
+
+
+def _apply_context(ctx: FakeBizHawkClientContext, changes: dict):
+    if "connected" in changes:
+        ctx.server.socket.open = changes["connected"]
+        ctx.server.socket.closed = not changes["connected"]
+    for key in ["slot", "team", "finished_game", "slot_data"]:
+        if key in changes:
+            setattr(ctx, key, changes[key])
+    if changes.get("reset_items", False):
+        ctx.items_received = []
+    ctx.items_received += [NetworkItem(*i) for i in changes.get("items", [])]
+    ctx.checked_locations.update(changes.get("checked", []))
+    ctx.locations_scouted.update(changes.get("scouted", []))
+
+
+class ReplayResult(NamedTuple):
+    replayed: ScenarioResult
+    recorded_round_trips: int
+    recorded_sends: int
+    recorded_errors: int
+
+    def __str__(self):
+        return (f"{RESULT_HEADER}\n{self.replayed}\n"
+                f"recorded: {self.recorded_round_trips} round trips, {self.recorded_sends} sends, "
+                f"{self.recorded_errors} errors")
+
+
+class TraceReplay:
+    """
+    Feeds a recorded session back into game_watcher, one recorded cycle per game_watcher call.
+    By default the recorded reads are applied to a FakeBizHawk's memory at the start of their cycle, and the client
+    reads from that, so a client that batches its reads differently still sees the same game.
+    Writes made within a cycle are visible to reads recorded later in that same cycle, which this can't reproduce.
+    With strict=True the client has to make the exact recorded reads and writes, in order, or TraceDivergence is
+    raised, and reads return the recorded bytes. That's for reproducing a session on the same client version.
+    The client's clock is the recorded cycle time, so timing based logic (missed loads) replays the same.
+    """
+
+    def __init__(self, path, strict=False):
+        self.path = path
+        self.strict = strict
+        self.cycles = load_cycles(path)
+        self.now = self.cycles[0].time if self.cycles else 0.0
+        self._expected: list[TraceEvent] = []
+        self._cycle_index = 0
+
+    def _next_expected(self, kind, request):
+        if not self._expected:
+            raise TraceDivergence(f"Cycle {self._cycle_index}: unrecorded {request}")
+        event = self._expected.pop(0)
+        if event.kind == EVENT_ERROR:
+            raise getattr(bizhawk, event.data, bizhawk.RequestFailedError)("Recorded error")
+        if event.kind != kind:
+            raise TraceDivergence(f"Cycle {self._cycle_index}: expected {event}, got {request}")
+        return event
+
+    def _strict_connector(self, fake: FakeBizHawk):
+        async def strict_read(bizhawk_ctx, read_list):
+            event = self._next_expected(EVENT_READ, read_list)
+            if [tuple(r) for r in read_list] != [(a, s, d) for a, s, d, _ in event.data]:
+                raise TraceDivergence(f"Cycle {self._cycle_index}: expected read {event.data}, got {read_list}")
+            await fake.read(bizhawk_ctx, read_list)
+            return [value for _, _, _, value in event.data]
+
+        async def strict_write(bizhawk_ctx, write_list):
+            event = self._next_expected(EVENT_WRITE, write_list)
+            if [(a, bytes(v), d) for a, v, d in write_list] != event.data:
+                raise TraceDivergence(f"Cycle {self._cycle_index}: expected write {event.data}, got {write_list}")
+            await fake.write(bizhawk_ctx, write_list)
+
+        return use_connector(strict_read, strict_write)
+
+    async def run(self, client, name="replay") -> ReplayResult:
+        """
+        :param client: a fresh client instance to replay into
+        :param name: name in the result
+        """
+        fake = FakeBizHawk()
+        harness = Harness(client, fake, FakeBizHawkClientContext())
+        client.clock = client.poll_scheduler.clock = lambda: self.now
+
+        with fake.install(), (self._strict_connector(fake) if self.strict else nullcontext()):
+            for self._cycle_index, cycle in enumerate(self.cycles):
+                self.now = cycle.time
+                _apply_context(harness.ctx, cycle.context)
+                if self.strict:
+                    self._expected = [e for e in cycle.events if e.kind in [EVENT_READ, EVENT_WRITE, EVENT_ERROR]]
+                else:
+                    for event in cycle.events:
+                        if event.kind == EVENT_READ:
+                            for address, size, domain, value in event.data:
+                                fake.memory[domain][address:address + size] = value
+                await harness.cycle()
+                if self.strict and self._expected:
+                    raise TraceDivergence(f"Cycle {self._cycle_index}: missing {self._expected}")
+
+        events = [e for cycle in self.cycles for e in cycle.events]
+        return ReplayResult(harness.result(name),
+                            sum(e.kind in [EVENT_READ, EVENT_WRITE] for e in events),
+                            sum(e.kind == EVENT_SEND for e in events),
+                            sum(e.kind == EVENT_ERROR for e in events))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded DSZeldaClient session")
+    parser.add_argument("trace", help="trace file, from client.start_trace_recording")
+    parser.add_argument("client", help="client class, as module:Class")
+    parser.add_argument("--strict", action="store_true", help="fail if the client's requests differ from the trace")
+    args = parser.parse_args(args)
+
+    module_name, class_name = args.client.split(":")
+    client_class = getattr(importlib.import_module(module_name), class_name)
+    print(asyncio.run(TraceReplay(args.trace, args.strict).run(client_class(), args.trace)))
+
+
+if __name__ == "__main__":
+    main()
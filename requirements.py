@@ -0,0 +1,112 @@
+class DynamicRequirements:
+    """
+    Requirements of a dynamic flag or dynamic entrance, compiled once from the raw data dict.
+    Item and location names are resolved to ids up front, so checking is only set lookups and int comparisons.
+    `data` is kept for game specific checks in has_special_dynamic_requirements.
+    """
+
+    def __init__(self, data: dict, items_data: dict, location_name_to_id: dict[str, int]):
+        self.data = data
+        self.name: str = data.get("name", None)
+
+        # Items, (id, count, operation) where operation is None, "has_exact" or "not_has"
+        self.has_items: tuple[tuple[int, int, str | None], ...] = tuple(
+            (items_data[item]["id"], count, operation[0] if operation else None)
+            for item, count, *operation in data.get("has_items", []))
+        self.not_has_all_items: tuple[tuple[int, int], ...] = tuple(
+            (items_data[item]["id"], count) for item, count, *_ in data.get("not_has_all_items", []))
+
+        # Locations
+        def location_ids(key):
+            return frozenset(location_name_to_id[loc] for loc in data[key]) if key in data else None
+
+        self.has_locations = location_ids("has_locations") or frozenset()
+        self.not_has_locations = location_ids("not_has_locations") or frozenset()
+        self.any_not_has_locations = location_ids("any_not_has_locations")
+        self.any_has_locations = location_ids("any_has_locations")
+
+        # Slot data, (key, value, value is a list of allowed values)
+        self.has_slot_data: tuple[tuple[str, object, bool], ...] = tuple(
+            (slot, value, type(value) is list) for slot, value in data.get("has_slot_data", []))
+
+        self.not_last_scenes = frozenset(data.get("not_last_scenes", []))
+        self.last_scenes = frozenset(data.get("last_scenes", []))
+
+        # Bits, (address, value, must not be set)
+        self.bits: tuple[tuple[int, int, bool], ...] = tuple(
+            (addr, v, "not" in args) for addr, v, *args in data.get("check_bits", [])
+            if not args or "not" in args)
+        self.addresses: tuple[int, ...] = tuple(sorted({addr for addr, *_ in data.get("check_bits", [])}))
+
+        self.not_on_entrance = frozenset(data["not_on_entrance"]) if "not_on_entrance" in data else None
+        self.on_entrance = frozenset(data["on_entrance"]) if "on_entrance" in data else None
+
+    def check_items(self, received_items) -> bool:
+        for item_id, count_want, operation in self.has_items:
+            count_have = received_items.count(item_id)
+            if operation is None:
+                if (count_want == 0 and count_have != 0) or (count_want > 0 and count_have < count_want):
+                    return False
+            elif operation == "has_exact":
+                if count_want != count_have:
+                    return False
+            elif operation == "not_has":
+                if count_have >= count_want:
+                    return False
+
+        if self.not_has_all_items:
+            if all(received_items.count(item_id) > count_want for item_id, count_want in self.not_has_all_items):
+                return False
+        return True
+
+    def check_locations(self, checked_locations) -> bool:
+        if not self.has_locations.issubset(checked_locations):
+            return False
+        if not self.not_has_locations.isdisjoint(checked_locations):
+            return False
+        if self.any_not_has_locations is not None:
+            return not self.any_not_has_locations.issubset(checked_locations)
+        if self.any_has_locations is not None:
+            return not self.any_has_locations.isdisjoint(checked_locations)
+        return True
+
+    def check_slot_data(self, slot_data: dict) -> bool:
+        for slot, value, is_list in self.has_slot_data:
+            if is_list:
+                if slot_data.get(slot, None) not in value:
+                    return False
+            elif slot_data.get(slot, None) != value:
+                return False
+        return True
+
+    def check_last_room(self, last_scene) -> bool:
+        if last_scene in self.not_last_scenes:
+            return False
+        for scene in self.last_scenes:
+            if last_scene != scene:
+                return False
+        return True
+
+    def check_bits(self, values: dict[int, int]) -> bool:
+        """
+        :param values: dict of address to read value, containing at least self.addresses
+        """
+        for addr, v, negate in self.bits:
+            if bool(values[addr] & v) == negate:
+                return False
+        return True
+
+    def check_entrance(self, entrance) -> bool:
+        if self.not_on_entrance is not None and entrance in self.not_on_entrance:
+            return False
+        if self.on_entrance is not None and entrance not in self.on_entrance:
+            return False
+        return True
+
+
+def compile_requirements(data_list, items_data: dict, location_name_to_id: dict[str, int]) -> dict[int, DynamicRequirements]:
+    """
+    compile a list of raw requirement dicts.
+    :return: dict of id(data) to compiled requirements. The compiled object keeps data alive, so the id stays valid
+    """
+    return {id(data): DynamicRequirements(data, items_data, location_name_to_id) for data in data_list}
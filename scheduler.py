@@ -0,0 +1,135 @@
+import time
+from collections import deque
+from typing import NamedTuple
+
+
+class PollDecision(NamedTuple):
+    time: float
+    state: str
+    interval: float
+    reason: str
+
+
+class PollScheduler:
+    """
+    Picks the game_watcher poll interval (ctx.watcher_timeout) from the client's state.
+    Polls fast around entrances and room loads, where the ER and bounce windows are only 6-11 frames long,
+    at the normal rate in game, and slower in menus or when paused with nothing happening for a while.
+    In game it never polls slower than `game`, since Link can walk into an entrance at any time.
+    Missed loading reads speed up the fast rates for a while, on top of that.
+    Every decision is kept in `decisions` for inspection.
+    """
+
+    def __init__(self, menu=0.5, game=0.1, idle=0.25, fast=0.05, minimum=0.016, maximum=1.0,
+                 idle_after=10.0, fast_after_load=1.0, boost_factor=0.5, boost_duration=60.0, history=200,
+                 clock=time.monotonic):
+        """
+        :param menu: interval in menus or disconnected
+        :param game: interval in game
+        :param idle: interval while paused, after `idle_after` seconds without activity
+        :param fast: interval while entering or loading a room, and for `fast_after_load` seconds after
+        :param minimum: no interval goes below this
+        :param maximum: no interval goes above this
+        :param idle_after: seconds without activity before a paused game polls at the idle rate
+        :param fast_after_load: seconds to keep polling fast after a room loads
+        :param boost_factor: game and fast intervals get multiplied by this for every recent missed load
+        :param boost_duration: seconds a missed load counts as recent
+        :param history: number of decisions to keep
+        :param clock:
+        """
+        self.menu = menu
+        self.game = game
+        self.idle = idle
+        self.fast = fast
+        self.minimum = minimum
+        self.maximum = maximum
+        self.idle_after = idle_after
+        self.fast_after_load = fast_after_load
+        self.boost_factor = boost_factor
+        self.boost_duration = boost_duration
+        self.clock = clock
+
+        self.decisions: deque[PollDecision] = deque(maxlen=history)
+        self.last_activity = clock()
+        self.last_room_load = None
+        self.missed_loads: deque[float] = deque()
+
+    @property
+    def last_decision(self) -> PollDecision | None:
+        return self.decisions[-1] if self.decisions else None
+
+    def note_activity(self):
+        self.last_activity = self.clock()
+
+    def note_room_loaded(self):
+        self.last_room_load = self.last_activity = self.clock()
+
+    def note_missed_load(self):
+        self.missed_loads.append(self.clock())
+
+    def _boost(self, now) -> float:
+        while self.missed_loads and now - self.missed_loads[0] > self.boost_duration:
+            self.missed_loads.popleft()
+        return self.boost_factor ** len(self.missed_loads)
+
+    def next_interval(self, state: str) -> float:
+        """
+        :param state: "menu", "transition" while entering or loading a room, "paused" or "game"
+        :return: seconds to wait before the next cycle
+        """
+        now = self.clock()
+        boost = self._boost(now)
+        if state == "menu":
+            interval, reason = self.menu, "menu"
+        elif state == "transition":
+            interval, reason = self.fast * boost, "transition"
+        elif self.last_room_load is not None and now - self.last_room_load < self.fast_after_load:
+            interval, reason = self.fast * boost, "room loaded"
+        elif state == "paused" and now - self.last_activity > self.idle_after:
+            interval, reason = self.idle, "idle"
+        else:
+            interval, reason = self.game * boost, "game"
+        if boost != 1 and reason not in ["menu", "idle"]:
+            reason += f", boosted x{1 / boost:g}"
+
+        interval = min(max(interval, self.minimum), self.maximum)
+        self.decisions.append(PollDecision(now, state, interval, reason))
+        return interval
+
+
+class Debouncer:
+    """
+    Holds the latest of a stream of values, and lets it out once it's been stable for `interval` seconds,
+    or on demand. A value equal to the last one let out is dropped.
+    """
+
+    def __init__(self, interval=1.0, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.pending = None
+        self.pending_since = None
+        self.published = None
+
+    def update(self, value):
+        if value != self.pending:
+            self.pending = value
+            self.pending_since = self.clock()
+
+    def take(self, force=False):
+        """
+        :param force: let the pending value out even if it hasn't been stable long enough
+        :return: the value to publish, or None
+        """
+        if self.pending is None or (not force and self.clock() - self.pending_since < self.interval):
+            return None
+        value, self.pending = self.pending, None
+        if value == self.published:
+            return None
+        self.published = value
+        return value
+
+    def reset(self):
+        """
+        forget what was published, for when the receiver may have lost it
+        """
+        self.published = None
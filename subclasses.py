@@ -1,10 +1,18 @@
 from enum import IntEnum
 
+from .tracing import trace_logger, er_logger
+
 class DSTransition:
     """
     Datastructures for dealing with Transitions on the client side.
     Not to be confused with PHEntrances, that deals with entrance objects during ER placement.
+    Slotted, since there's two per entrance. Continuous detection bounds are pulled out of extra_data on construction
+    and whenever extra_data is assigned (that includes `extra_data |= ...`), mutate its keys directly and they go stale.
     """
+    __slots__ = ("data", "name", "id", "entrance", "exit", "entrance_region", "exit_region", "two_way",
+                 "category_group", "direction", "island", "coords", "_extra_data", "stage", "room", "scene",
+                 "exit_scene", "exit_stage", "y", "x_min", "x_max", "z_min", "z_max", "vanilla_reciprocal",
+                 "copy_number")
     entrance_groups: IntEnum | None = None  # set these in game instance or
     opposite_entrance_groups: dict[IntEnum, IntEnum] | None = None
 
@@ -34,6 +42,18 @@ class DSTransition:
 
         self.copy_number = 0
 
+    @property
+    def extra_data(self) -> dict:
+        return self._extra_data
+
+    @extra_data.setter
+    def extra_data(self, extra_data: dict):
+        self._extra_data = extra_data
+        self.x_min = extra_data.get("x_min", -0x8FFFFFFF)
+        self.x_max = extra_data.get("x_max", 0x8FFFFFFF)
+        self.z_min = extra_data.get("z_min", -0x8FFFFFFF)
+        self.z_max = extra_data.get("z_max", 0x8FFFFFFF)
+
     def get_scene(self):
         if self.room:
             return self.stage * 0x100 + self.room
@@ -63,15 +83,9 @@ class DSTransition:
             if entrance < 0xF0:
                 return True
             # Continuous entrance check
-            x_max = self.extra_data.get("x_max", 0x8FFFFFFF)
-            x_min = self.extra_data.get("x_min", -0x8FFFFFFF)
-            z_max = self.extra_data.get("z_max", 0x8FFFFFFF)
-            z_min = self.extra_data.get("z_min", -0x8FFFFFFF)
-            y = self.coords[1] if self.coords else coords["y"] - y_offest
-            # print(f"Checking entrance {self.name}: x {x_max} > {coords['x']} > {x_min}")
-            # print(f"\ty: {y + 1000} > {y} > {coords['y'] - y_offest}")
-            # print(f"\tz: {z_max} > {coords['z']} > {z_min}")
-            if y + 2000 > coords["y"] - y_offest >= y and x_max > coords["x"] > x_min and z_max > coords["z"] > z_min:
+            link_y = coords["y"] - y_offest
+            y = link_y if self.y is None else self.y
+            if y + 2000 > link_y >= y and self.x_max > coords["x"] > self.x_min and self.z_max > coords["z"] > self.z_min:
                 return True
         return False
 
@@ -98,61 +112,81 @@ class DSTransition:
         return self.name
 
     def debug_print(self):
-        print(f"Debug print for entrance {self.name}")
-        print(f"\tentrance {self.entrance}")
-        print(f"\texit {self.exit}")
-        print(f"\tcoords {self.coords}")
-        print(f"\textra_data {self.extra_data}")
+        er_logger.debug("Debug print for entrance %s\n\tentrance %s\n\texit %s\n\tcoords %s\n\textra_data %s",
+                        self.name, self.entrance, self.exit, self.coords, self.extra_data)
 
     @classmethod
-    def from_data(cls, entrance_data):
-        res = dict()
-        counter = {}
-        ident = 0
+    def from_data(cls, entrance_data, cache=False) -> "TransitionTable":
+        """
+        build every transition and its reverse from an entrance table, in one pass
+        :param entrance_data: entrance name to entrance data
+        :param cache: load the built table from disk if this entrance table was built before, and store it if it had to
+        build. keyed on a hash of the entrance table's contents and of the source of this module and cls
+        :return: name to transition dict, with transitions by id in `by_id`
+        """
+        if cache:
+            import inspect
+            from .tables import data_hash, source_hash, load_cached_table, store_cached_table
+            content_hash = data_hash(entrance_data)
+            if content_hash is None:
+                return cls.from_data(entrance_data)
+            # The code the transitions are made of is part of the key too, its fields and slots end up in the pickle
+            code_hash = source_hash(__file__, inspect.getfile(cls))
+            cache_name = f"transitions_{cls.__name__}_{content_hash}_{code_hash}"
+            res = load_cached_table(cache_name)
+            if isinstance(res, TransitionTable):
+                return res
+            res = cls.from_data(entrance_data)
+            store_cached_table(cache_name, res)
+            return res
+
+        res = TransitionTable()
+        by_id = res.by_id
+        none_group = cls.entrance_groups.NONE if cls.entrance_groups else None
         for name, data in entrance_data.items():
-            res[name] = cls(name, data)
-            res[name].id = ident
-            # print(f"{i} {ENTRANCES[name].entrance_region} -> {ENTRANCES[name].exit_region}")
-            ident += 1
-            point = data["entrance_region"] + "<=>" + data["exit_region"]
-            counter.setdefault(point, 0)
-            counter[point] += 1
+            if name in res:
+                trace_logger.warning("DUPLICATE ENTRANCE!!! %s", name)
+            forward = res[name] = cls(name, data)
+            forward.id = len(by_id)
+            by_id.append(forward)
             if "one_way_data" in data:
-                res[name].extra_data |= data["one_way_data"]
+                forward.extra_data |= data["one_way_data"]
 
-            if data.get("two_way", True):
-                two_way = True
-            else:
-                two_way = False
-            reverse_name = data.get("return_name", f"Unnamed Entrance {ident}")
+            reverse_name = data.get("return_name", f"Unnamed Entrance {len(by_id)}")
             reverse_data = {
                 "entrance_region": data.get("reverse_exit_region", data["exit_region"]),
                 "exit_region": data.get("reverse_entrance_region", data["entrance_region"]),
-                "id": ident,
+                "id": len(by_id),
                 "entrance": data.get("exit", data.get("entrance", None)),
                 "exit": data["entrance"],
-                "two_way": two_way,
+                "two_way": bool(data.get("two_way", True)),
                 "type": data["type"],
-                "island": data.get("return_island", data.get("island", cls.entrance_groups.NONE)),
+                "island": data.get("return_island", data.get("island", none_group)),
                 "direction": cls.opposite_entrance_groups[data["direction"]],
                 "coords": data.get("coords", None),
-
             }
-            if "extra_data" in data:
-                reverse_data["extra_data"] = data["extra_data"]
             if "reverse_one_way_data" in data:
-                reverse_data.setdefault("extra_data", {})
                 reverse_data["extra_data"] = data["reverse_one_way_data"]
+            elif "extra_data" in data:
+                reverse_data["extra_data"] = data["extra_data"]
             if reverse_name in res:
-                print(f"DUPLICATE ENTRANCE!!! {reverse_name}")
-            res[reverse_name] = cls(reverse_name, reverse_data)
-
-            res[name].vanilla_reciprocal = res[reverse_name]
-            res[reverse_name].vanilla_reciprocal = res[name]
-
-            # print(f"{i} {ENTRANCES[reverse_name].entrance_region} -> {ENTRANCES[reverse_name].exit_region}")
-            ident += 1
-            point: str = reverse_data["entrance_region"] + "<=>" + reverse_data["exit_region"]
-            counter.setdefault(point, 0)
-            counter[point] += 1
-        return res
\ No newline at end of file
+                trace_logger.warning("DUPLICATE ENTRANCE!!! %s", reverse_name)
+            reverse = res[reverse_name] = cls(reverse_name, reverse_data)
+            by_id.append(reverse)
+
+            forward.vanilla_reciprocal = reverse
+            reverse.vanilla_reciprocal = forward
+        return res
+
+
+class TransitionTable(dict):
+    """
+    Transitions by name, as built by DSTransition.from_data. `by_id` holds the same transitions indexed by their id
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.by_id: list[DSTransition] = []
+
+    def get_by_id(self, ident: int) -> DSTransition | None:
+        return self.by_id[ident] if 0 <= ident < len(self.by_id) else None
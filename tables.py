@@ -0,0 +1,147 @@
+import hashlib
+import importlib
+import os
+import pickle
+import time
+from contextlib import contextmanager
+
+from .tracing import trace_logger
+
+# Startup timings in seconds, "import <module>" for the game modules the client imports, and "<table>" /
+# "<table> (cached)" for every table build, recorded on first use
+startup_times: dict[str, float] = {}
+
+_data_hash: str | None = None
+
+
+def record_startup_time(name: str, seconds: float):
+    startup_times[name] = startup_times.get(name, 0.0) + seconds
+
+
+@contextmanager
+def startup_timer(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_startup_time(name, time.perf_counter() - start)
+
+
+def startup_report() -> str:
+    """
+    :return: import and table build times in milliseconds
+    """
+    lines = [f"{'startup':<40}{'ms':>9}"]
+    lines += [f"{name:<40}{seconds * 1000:>9.2f}" for name, seconds in startup_times.items()]
+    return "\n".join(lines)
+
+
+def data_hash(data=None) -> str | None:
+    """
+    hash of the game's Util module and data package sources, that the tables are built from.
+    With `data`, a hash of its pickled contents instead, for tables built from data passed in.
+    None if it can't be pickled
+    """
+    global _data_hash
+    if data is not None:
+        try:
+            return hashlib.sha256(pickle.dumps(data, protocol=4)).hexdigest()[:16]
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+    if _data_hash is None:
+        world_package = importlib.import_module(__package__.rsplit(".", 1)[0])
+        world_dir = os.path.dirname(world_package.__file__)
+        paths = [os.path.join(world_dir, "Util.py")]
+        data_dir = os.path.join(world_dir, "data")
+        if os.path.isdir(data_dir):
+            paths += sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith(".py"))
+        digest = hashlib.sha256()
+        for path in paths:
+            if os.path.isfile(path):
+                digest.update(os.path.basename(path).encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        _data_hash = digest.hexdigest()[:16]
+    return _data_hash
+
+
+def source_hash(*paths: str) -> str:
+    """
+    hash of source files, for keying caches of objects whose classes are defined in them
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(path.encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_file(name: str) -> str:
+    import Utils
+    world = __package__.rsplit(".", 1)[0].rsplit(".", 1)[-1]
+    return Utils.cache_path("dszeldaclient", f"{world}_{name}_{data_hash()}.pickle")
+
+
+def load_cached_table(name: str):
+    try:
+        with open(cache_file(name), "rb") as f:
+            return pickle.load(f)
+    # Pickles of classes that changed since can fail in about any way, rebuild then
+    except (OSError, pickle.UnpicklingError, EOFError, ImportError, AttributeError, TypeError, ValueError,
+            IndexError, KeyError) as e:
+        trace_logger.debug("Couldn't load cached table %s: %s", name, e)
+        return None
+
+
+def store_cached_table(name: str, table):
+    try:
+        path = cache_file(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(table, f)
+    except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+        trace_logger.debug("Couldn't cache table %s: %s", name, e)
+
+
+class LazyTable:
+    """
+    Client attribute that gets built the first time it's read, then stored on the instance like a normal attribute.
+    `builder` is the name of a build function in the game's Util module, or a method of the client.
+    Tables with cache=True are kept on disk, keyed by a hash of Util and the data package, when the client has
+    table_cache set. Only use that for tables of plain values, since a cached table holds copies, not the data
+    module's own dicts and transition objects.
+    """
+
+    def __init__(self, builder, cache=False):
+        self.builder = builder
+        self.cache = cache
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def build(self, instance):
+        start = time.perf_counter()
+        use_cache = self.cache and getattr(instance, "table_cache", False)
+        table = load_cached_table(self.name) if use_cache else None
+        if table is not None:
+            record_startup_time(f"{self.name} (cached)", time.perf_counter() - start)
+            return table
+
+        if isinstance(self.builder, str):
+            table = getattr(importlib.import_module("..Util", __package__), self.builder)()
+        else:
+            table = self.builder(instance)
+        record_startup_time(self.name, time.perf_counter() - start)
+        if use_cache:
+            store_cached_table(self.name, table)
+        return table
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        table = instance.__dict__[self.name] = self.build(instance)
+        return table
@@ -0,0 +1,86 @@
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# Verbose client tracing. Children of the "Client" logger, so user facing messages stay on that one.
+# Once the client starts them, debug and info records go through a queue and get written by a background thread,
+# so the watcher never waits on terminal output. Warnings and errors still reach the Client logger's handlers,
+# the log file and the client window.
+trace_logger = logging.getLogger("Client.DSZelda")
+er_logger = logging.getLogger("Client.DSZelda.ER")
+item_logger = logging.getLogger("Client.DSZelda.Items")
+location_logger = logging.getLogger("Client.DSZelda.Locations")
+flag_logger = logging.getLogger("Client.DSZelda.DynamicFlags")
+memory_logger = logging.getLogger("Client.DSZelda.Memory")
+
+SUBSYSTEM_LOGGERS = {
+    "client": trace_logger,
+    "er": er_logger,
+    "items": item_logger,
+    "locations": location_logger,
+    "dynamic_flags": flag_logger,
+    "memory": memory_logger,
+}
+
+_trace_listener: QueueListener | None = None
+
+
+class _ForwardHandler(logging.Handler):
+    """
+    hands records on to another logger, like propagating would
+    """
+
+    def __init__(self, target: logging.Logger, level=logging.NOTSET):
+        super().__init__(level)
+        self.target = target
+
+    def emit(self, record):
+        self.target.handle(record)
+
+
+def start_trace_logging(stream=sys.stdout):
+    """
+    route the trace loggers through a queue to `stream`. Safe to call more than once
+    """
+    global _trace_listener
+    if _trace_listener is not None:
+        return
+    trace_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    queue_handler = QueueHandler(trace_queue)
+    queue_handler.addFilter(lambda record: record.levelno < logging.WARNING)
+    trace_logger.addHandler(queue_handler)
+    trace_logger.addHandler(_ForwardHandler(trace_logger.parent, logging.WARNING))
+    trace_logger.propagate = False
+    if trace_logger.level == logging.NOTSET:
+        trace_logger.setLevel(logging.INFO)
+    _trace_listener = QueueListener(trace_queue, stream_handler)
+    _trace_listener.start()
+    atexit.register(stop_trace_logging)
+
+
+def stop_trace_logging():
+    """
+    flush and stop the trace logging thread
+    """
+    global _trace_listener
+    if _trace_listener is not None:
+        _trace_listener.stop()
+        _trace_listener = None
+
+
+def set_trace(subsystem: str = "client", enabled=True):
+    """
+    switch verbose tracing at runtime.
+    :param subsystem: one of SUBSYSTEM_LOGGERS. "client" switches every subsystem that wasn't set on its own
+    :param enabled:
+    """
+    SUBSYSTEM_LOGGERS[subsystem].setLevel(logging.DEBUG if enabled else logging.INFO)
+
+
+def is_tracing(subsystem: str = "client") -> bool:
+    return SUBSYSTEM_LOGGERS[subsystem].isEnabledFor(logging.DEBUG)
+